@@ -1,4 +1,4 @@
-import tenseal as ts
+from tenseal_backend import ts
 import os
 
 # 定义模拟的文件存储路径 (在生产环境中，这对应网络发送)
@@ -0,0 +1,338 @@
+"""
+客户端批量解密流水线 (Parallel Batch Decryption)
+---------------------------------------------------------
+Key_Separation.py 第 3 步中 Alice 逐个读取结果文件、ckks_vector_from、单线程解密。
+客户端每批会收到成千上万个结果密文，这一步成为瓶颈。
+
+本模块:
+    1. 私钥 Context 在每个工作进程中只加载一次 (复用 tenseal_scheduler.Scheduler)
+    2. 输入来源: 文件列表 / zip、tar 归档 / 长度前缀的字节流
+       - 文件与 zip 成员只把路径发给工作进程，由工作进程自己读取，避免密文经管道中转
+       - tar 与字节流只能顺序读取，由主进程读出后分块发送
+    3. 结果直接写入 NumPy 数组:
+       - out=ndarray: 工作进程返回每块的 ndarray，主进程按行下标写入预分配数组
+       - path=...:    工作进程直接写入共享的内存映射文件 (np.memmap)，只回传行数
+       两种方式都不在进程间传递或累积 Python 列表
+       (TenSEAL 的 decrypt() 本身返回列表，在工作进程内立即转为数组)。
+    4. 结果长度可以不同，较短的行以 fill 值 (CKKS 为 NaN，BFV 为 0) 补齐，lengths 记录实际长度。
+
+使用方法:
+    with BatchDecryptor(secret_bytes) as dec:
+        out, lengths = dec.decrypt(from_files(paths), width=4096, path="results.npy.mmap")
+"""
+
+import io
+import os
+import struct
+import tarfile
+import time
+import zipfile
+
+import numpy as np
+
+from tenseal_backend import ts
+from tenseal_scheduler import Scheduler
+
+# 每个任务包含的密文个数: 摊薄进程间通信开销
+CHUNK_SIZE = 64
+
+# 字节流帧头: 8 字节大端无符号长度
+FRAME_HEADER = struct.Struct(">Q")
+
+KINDS = ("ckks", "bfv", "ckks_tensor", "bfv_tensor")
+
+
+# ==============================================================================
+# 输入来源 (Sources)
+# ==============================================================================
+# 每个来源产出条目 item，工作进程通过 _read_item 取得密文字节:
+#     ("file", path) | ("zip", archive_path, member) | ("bytes", data)
+
+def from_files(paths):
+    return [("file", os.fspath(p)) for p in paths]
+
+
+def from_directory(directory, suffix=".ts"):
+    names = sorted(n for n in os.listdir(directory) if n.endswith(suffix))
+    return from_files(os.path.join(directory, n) for n in names)
+
+
+def from_archive(path):
+    """zip 支持随机访问，交给工作进程读取；tar 只能顺序读取，由主进程读出。"""
+    path = os.fspath(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            members = sorted(info.filename for info in zf.infolist() if not info.is_dir())
+        return [("zip", path, m) for m in members]
+    return _iter_tar(path)
+
+
+def _iter_tar(path):
+    with tarfile.open(path) as tf:
+        for member in sorted((m for m in tf.getmembers() if m.isfile()), key=lambda m: m.name):
+            yield "bytes", tf.extractfile(member).read()
+
+
+def from_stream(stream):
+    """读取 write_stream 写出的长度前缀帧，直到流结束。"""
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) != FRAME_HEADER.size:
+            raise ValueError("字节流在帧头处被截断")
+        (length,) = FRAME_HEADER.unpack(header)
+        data = stream.read(length)
+        if len(data) != length:
+            raise ValueError("字节流在帧数据处被截断")
+        yield "bytes", data
+
+
+def write_stream(stream, blobs):
+    """以长度前缀帧写出一批序列化密文 (服务端回传结果时使用)。"""
+    for blob in blobs:
+        stream.write(FRAME_HEADER.pack(len(blob)))
+        stream.write(blob)
+
+
+# ==============================================================================
+# 工作进程 (Worker)
+# ==============================================================================
+
+def _read_item(item, archives):
+    """archives: 本块内已打开的 zip (路径 -> ZipFile)，由 _decrypt_chunk 在块结束时关闭。"""
+    kind = item[0]
+    if kind == "bytes":
+        return item[1]
+    if kind == "file":
+        with open(item[1], "rb") as f:
+            return f.read()
+    if kind == "zip":
+        zf = archives.get(item[1])
+        if zf is None:
+            zf = archives[item[1]] = zipfile.ZipFile(item[1])
+        return zf.read(item[2])
+    raise ValueError(f"未知的条目类型: {kind}")
+
+
+def _decrypt_one(ctx, kind, data):
+    if kind == "ckks":
+        return ts.ckks_vector_from(ctx, data).decrypt()
+    if kind == "bfv":
+        return ts.bfv_vector_from(ctx, data).decrypt()
+    if kind == "ckks_tensor":
+        return ts.ckks_tensor_from(ctx, data).decrypt().raw
+    return ts.bfv_tensor_from(ctx, data).decrypt().raw
+
+
+def _decrypt_chunk(ctx, kind, start, items, width, dtype, fill, mmap_spec):
+    """
+    解密一块连续条目。mmap_spec=(path, shape) 时直接写入内存映射文件并返回 (start, lengths)，
+    否则返回 (start, lengths, rows)。
+    """
+    if mmap_spec:
+        # 每块重新打开映射 (相对解密耗时可忽略)，调用方在两批之间删除/重建文件时不会写到旧 inode
+        path, shape = mmap_spec
+        mm = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        rows = mm[start:start + len(items)]
+    else:
+        rows = np.full((len(items), width), fill, dtype=dtype)
+    lengths = np.empty(len(items), dtype=np.int64)
+    # zip 同样每块重新打开: 块内成员共用一次打开，块结束即关闭，不会读到已被替换的旧归档
+    archives = {}
+    try:
+        for i, item in enumerate(items):
+            values = _decrypt_one(ctx, kind, _read_item(item, archives))
+            if len(values) > width:
+                raise ValueError(f"第 {start + i} 个结果长度 {len(values)} 超过输出宽度 {width}")
+            rows[i, :len(values)] = values
+            lengths[i] = len(values)
+    finally:
+        for zf in archives.values():
+            zf.close()
+    if mmap_spec:
+        mm.flush()
+        del rows, mm
+        return start, lengths
+    return start, lengths, rows
+
+
+# ==============================================================================
+# 批量解密器 (BatchDecryptor)
+# ==============================================================================
+
+class BatchDecryptor:
+    """
+    私钥 Context 常驻工作进程的批量解密器；同一个实例可以处理多批结果。
+    workers=0 时在当前进程内串行执行 (小批量时省去进程启动开销)。
+    """
+
+    def __init__(self, secret_context_bytes, kind="ckks", workers=None, chunk_size=CHUNK_SIZE, **scheduler_kwargs):
+        if kind not in KINDS:
+            raise ValueError(f"kind 必须是 {KINDS} 之一")
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.dtype = np.int64 if kind.startswith("bfv") else np.float64
+        self.fill = 0 if kind.startswith("bfv") else np.nan
+        self.stats = {"ciphertexts": 0, "seconds": 0.0}
+
+        self._ctx, self._scheduler = None, None
+        if workers == 0:
+            self._ctx = ts.context_from(secret_context_bytes)
+            if not self._ctx.has_secret_key():
+                raise ValueError("BatchDecryptor 需要带私钥的 Context")
+        else:
+            # 解密单个密文不使用 TenSEAL 线程池，全部核心用于进程级并行
+            self._scheduler = Scheduler(secret_context_bytes, n_threads=1, workers=workers, **scheduler_kwargs)
+
+    def _allocate(self, n, width, out, path):
+        if out is not None:
+            if out.shape[0] < n or out.shape[1] < width:
+                raise ValueError(f"输出数组形状 {out.shape} 小于 ({n}, {width})")
+            return out, None
+        if path is not None:
+            mm = np.memmap(path, dtype=self.dtype, mode="w+", shape=(n, width))
+            mm[:] = self.fill
+            mm.flush()
+            return mm, (os.fspath(path), (n, width))
+        return np.full((n, width), self.fill, dtype=self.dtype), None
+
+    def decrypt(self, items, width, out=None, path=None, n=None):
+        """
+        解密 items 中的全部结果，返回 (array, lengths)。
+            out:  预分配的 (n, >=width) 数组
+            path: 内存映射文件路径 (工作进程直接写入)
+            n:    条目数；items 为生成器 (tar / 字节流) 且未给出 out 时必填
+        """
+        if n is None:
+            if out is not None:
+                n = out.shape[0]
+            elif hasattr(items, "__len__"):
+                n = len(items)
+            else:
+                raise ValueError("items 为流式来源时需要提供 n 或 out")
+        array, mmap_spec = self._allocate(n, width, out, path)
+        lengths = np.zeros(n, dtype=np.int64)
+        start_time = time.perf_counter()
+
+        total, pending = 0, []
+        for start, chunk in self._chunks(items, n):
+            total += len(chunk)
+            args = (self.kind, start, chunk, width, self.dtype, self.fill, mmap_spec)
+            if self._scheduler is None:
+                self._store(array, lengths, _decrypt_chunk(self._ctx, *args), mmap_spec)
+            else:
+                pending.append(self._scheduler.submit(_decrypt_chunk, *args))
+                # 限制在途任务数，流式来源不会把全部密文读进内存
+                while len(pending) > self._scheduler.workers * 4:
+                    self._store(array, lengths, pending.pop(0).result(), mmap_spec)
+        while pending:
+            self._store(array, lengths, pending.pop(0).result(), mmap_spec)
+
+        if total != n:
+            raise ValueError(f"来源中有 {total} 个结果，与 n={n} 不一致")
+        if isinstance(array, np.memmap):
+            array.flush()
+        self.stats["ciphertexts"] += total
+        self.stats["seconds"] += time.perf_counter() - start_time
+        return array, lengths
+
+    def _chunks(self, items, n):
+        chunk, start = [], 0
+        for i, item in enumerate(items):
+            if i >= n:
+                raise ValueError(f"来源中的结果多于 n={n}")
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield start, chunk
+                chunk, start = [], i + 1
+        if chunk:
+            yield start, chunk
+
+    @staticmethod
+    def _store(array, lengths, result, mmap_spec):
+        start, chunk_lengths = result[0], result[1]
+        lengths[start:start + len(chunk_lengths)] = chunk_lengths
+        if mmap_spec is None:
+            rows = result[2]
+            array[start:start + len(rows), :rows.shape[1]] = rows
+
+    def warm_up(self):
+        if self._scheduler is not None:
+            self._scheduler.warm_up()
+
+    def describe(self):
+        return self._scheduler.describe() if self._scheduler is not None else "当前进程串行"
+
+    def close(self):
+        if self._scheduler is not None:
+            self._scheduler.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    from tenseal_config import CONFIG_LR, create_context
+
+    print(">>> [模块] 客户端批量解密")
+
+    n_results, size = 1000, 512
+    rng = np.random.default_rng(0)
+    client_ctx = create_context(CONFIG_LR, galois_keys=False)
+    secret_bytes = client_ctx.serialize(save_secret_key=True)
+    expected = rng.uniform(-10, 10, (n_results, size))
+    blobs = [ts.ckks_vector(client_ctx, row).serialize() for row in expected]
+
+    work_dir = tempfile.mkdtemp(prefix="batch_decrypt_")
+    paths = []
+    for i, blob in enumerate(blobs):
+        paths.append(os.path.join(work_dir, f"result_{i:05d}.ts"))
+        with open(paths[-1], "wb") as f:
+            f.write(blob)
+    zip_path = os.path.join(work_dir, "results.zip")
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for p in paths:
+            zf.write(p, os.path.basename(p))
+    stream_bytes = io.BytesIO()
+    write_stream(stream_bytes, blobs)
+    print(f"准备 {n_results} 个结果密文 (每个 {len(blobs[0]) / 1e3:.0f}KB)")
+
+    # --- A. 基线: Key_Separation.py 的写法 (单线程，逐个解密后存入列表) ---
+    start = time.perf_counter()
+    ctx = ts.context_from(secret_bytes)
+    baseline = []
+    for p in paths:
+        with open(p, "rb") as f:
+            baseline.append(ts.ckks_vector_from(ctx, f.read()).decrypt())
+    baseline = np.array(baseline)
+    base_time = time.perf_counter() - start
+    print(f"\n{'基线 (单线程 + 列表)':<26} {base_time:.2f}s ({n_results / base_time:.0f} 个/s)")
+
+    # --- B. 流水线: 不同来源与输出 ---
+    with BatchDecryptor(secret_bytes) as dec:
+        dec.warm_up()
+        runs = [
+            ("文件 -> 预分配数组", lambda: dec.decrypt(from_files(paths), size, out=np.empty((n_results, size)))),
+            ("zip -> 内存映射文件", lambda: dec.decrypt(from_archive(zip_path), size,
+                                                   path=os.path.join(work_dir, "out.mmap"))),
+            ("字节流 -> 新数组", lambda: dec.decrypt(from_stream(io.BytesIO(stream_bytes.getvalue())), size,
+                                                n=n_results)),
+        ]
+        for label, fn in runs:
+            start = time.perf_counter()
+            out, lengths = fn()
+            elapsed = time.perf_counter() - start
+            err = np.max(np.abs(out - expected))
+            print(f"{label:<26} {elapsed:.2f}s ({n_results / elapsed:.0f} 个/s, 加速 {base_time / elapsed:.2f}x) "
+                  f"| 最大误差 {err:.1e} | 长度 {set(lengths.tolist())}")
+        print(f"工作进程: {dec.describe()}")
+
+    shutil.rmtree(work_dir)
@@ -0,0 +1,327 @@
+"""
+BFV 加密聚合: 直方图 / 分位数 / 分组计数与求和 (Encrypted Aggregation)
+---------------------------------------------------------
+ckks_statistics_demo.py 只覆盖求和与方差。分类数据 (年龄段、地区、类别) 的统计需要
+直方图与 GROUP BY，BFV 的精确整数运算正好适合。
+
+数据流:
+    1. [客户端] 把每条记录的组号 one-hot 编码到槽位中，本地先累加 (np.bincount)，
+       得到 [计数块 | 求和块 ...] 的打包向量，加密后上传。一个客户端可持有任意多条记录。
+    2. [服务端] 只做密文加法: 所有客户端的密文按二叉树归并 (TreeReducer)，
+       一次归并同时得到全部组的计数与求和。不需要 Galois / Relin Keys，公钥 Context 很小。
+    3. [私钥持有方] 解密打包结果，拆出各组计数与求和；由累积直方图推导分位数。
+
+槽位布局 (PackedLayout):
+    slot = block * n_groups + group，block 0 为计数，block 1.. 为各数值列的求和。
+    超过一个密文的槽位数时按 slots 切分为多个密文 (chunk)，每个 chunk 独立归并，
+    因此组数可以到数千甚至更多。
+
+明文模数与溢出:
+    BFV 结果对 plain_modulus 取模。CONFIG_VOTING 的 1032193 只够约一百万的总量，
+    百万级记录的数值求和会回绕。create_aggregation_context 根据
+    记录数上限 × 数值上限自动选择满足批处理条件 (t ≡ 1 mod 2N) 的素数；只做加法时
+    Degree 4096 的噪声预算足以容纳 50 bits 以内的明文模数。
+
+使用方法:
+    layout = PackedLayout(n_groups=2000, n_values=1, slots=4096)
+    ctx, t = create_aggregation_context(max_records=10**6, max_value=100)
+    blobs = AggregationClient(public_ctx, layout).encrypt(groups, values)
+    reducer = TreeReducer(public_ctx); reducer.add_blobs(blobs)
+    counts, sums = decrypt_aggregate(ctx, reducer.result(), layout, t)
+"""
+
+import math
+import time
+
+import numpy as np
+
+from tenseal_backend import ts
+from tenseal_config import CONFIG_VOTING, SCHEME_BFV, resolve_scheme, scheme_name
+
+
+# ==============================================================================
+# 明文模数 (Plain Modulus)
+# ==============================================================================
+
+def is_prime(n):
+    """确定性 Miller-Rabin (对 n < 3.3e24 正确)。"""
+    if n < 2:
+        return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for p in bases:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in bases:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def batching_prime(bound, poly_modulus_degree):
+    """大于 bound 的最小批处理素数 (t ≡ 1 mod 2N，SEAL 批处理的前提)。"""
+    m = 2 * poly_modulus_degree
+    k = bound // m + 1
+    while not is_prime(k * m + 1):
+        k += 1
+    return k * m + 1
+
+
+def create_aggregation_context(max_records, max_value=1, signed=False, config=CONFIG_VOTING):
+    """
+    按聚合结果上限选择 plain_modulus 并创建 BFV Context (不生成 Galois / Relin Keys)。
+    结果上限 = max_records × max_value；signed=True 时按中心化区间需要 2 倍余量。
+    CONFIG_VOTING 的模数够用时直接沿用。
+    返回 (context, plain_modulus)；TenSEAL 不能从 Context 读回明文模数，解码时需要它。
+    """
+    if scheme_name(config["scheme_type"]) != SCHEME_BFV:
+        raise ValueError("聚合需要 BFV 配置")
+    bound = max(max_records, max_records * max_value) * (2 if signed else 1)
+    plain_modulus = config["plain_modulus"]
+    if plain_modulus <= bound:
+        plain_modulus = batching_prime(bound, config["poly_modulus_degree"])
+    if plain_modulus.bit_length() > 50:
+        raise ValueError(f"结果上限 {bound} 需要 {plain_modulus.bit_length()} bits 明文模数，超出噪声预算")
+    ctx = ts.context(resolve_scheme(SCHEME_BFV), poly_modulus_degree=config["poly_modulus_degree"],
+                     plain_modulus=plain_modulus)
+    return ctx, plain_modulus
+
+
+# ==============================================================================
+# 槽位布局 (Packed Layout)
+# ==============================================================================
+
+class PackedLayout:
+    """[计数块 | 数值列 1 的求和块 | ...]，按 slots 切分为多个密文。"""
+
+    def __init__(self, n_groups, n_values=0, slots=CONFIG_VOTING["poly_modulus_degree"]):
+        self.n_groups = n_groups
+        self.n_values = n_values
+        self.slots = slots
+        self.size = n_groups * (1 + n_values)
+        self.n_chunks = math.ceil(self.size / slots)
+
+    def pack(self, counts, sums=None):
+        flat = np.zeros(self.n_chunks * self.slots, dtype=np.int64)
+        flat[:self.n_groups] = counts
+        for j in range(self.n_values):
+            start = (1 + j) * self.n_groups
+            flat[start:start + self.n_groups] = sums[:, j]
+        return flat.reshape(self.n_chunks, self.slots)
+
+    def unpack(self, chunks):
+        flat = np.asarray(chunks).reshape(-1)[:self.size]
+        counts = flat[:self.n_groups]
+        sums = flat[self.n_groups:].reshape(self.n_values, self.n_groups).T
+        return counts, sums
+
+    def encode(self, groups, values=None):
+        """
+        记录 -> 本地累加后的打包向量 (one-hot 的和)。
+        groups: (n,) 组号；values: (n,) 或 (n, n_values) 非负整数 (定点数请先乘以缩放因子)。
+        """
+        groups = np.asarray(groups, dtype=np.int64)
+        if groups.size and (groups.min() < 0 or groups.max() >= self.n_groups):
+            raise ValueError(f"组号必须在 [0, {self.n_groups}) 内")
+        counts = np.bincount(groups, minlength=self.n_groups)
+        sums = None
+        if self.n_values:
+            values = np.asarray(values, dtype=np.int64).reshape(len(groups), self.n_values)
+            sums = np.stack([np.bincount(groups, weights=values[:, j], minlength=self.n_groups)
+                             for j in range(self.n_values)], axis=1).astype(np.int64)
+        return self.pack(counts, sums)
+
+
+# ==============================================================================
+# 客户端 / 服务端 / 私钥持有方
+# ==============================================================================
+
+class AggregationClient:
+    """数据所有者: 本地编码并加密，返回每个 chunk 的序列化密文。"""
+
+    def __init__(self, context, layout):
+        self.ctx = context
+        self.layout = layout
+
+    def encrypt(self, groups, values=None):
+        return [ts.bfv_vector(self.ctx, chunk).serialize() for chunk in self.layout.encode(groups, values)]
+
+
+class TreeReducer:
+    """
+    服务端二叉树归并。每个 chunk 维护一个“二进制计数器”栈:
+    第 k 层保存 2^k 个输入的部分和，新输入逐层进位合并。
+    流式输入时内存为 O(log n) 个密文，加法次数与线性累加相同 (n - 1)，
+    各子树互不依赖，可以分片到多个工作进程后再合并 (merge)。
+    """
+
+    def __init__(self, context, n_chunks=1):
+        self.ctx = context
+        self.n_chunks = n_chunks
+        self.levels = [[] for _ in range(n_chunks)]
+        self.count = 0
+
+    def add(self, vectors):
+        """加入一个客户端的全部 chunk 密文。"""
+        if len(vectors) != self.n_chunks:
+            raise ValueError(f"需要 {self.n_chunks} 个 chunk，收到 {len(vectors)} 个")
+        for chunk, vec in enumerate(vectors):
+            stack = self.levels[chunk]
+            level = 0
+            while level < len(stack) and stack[level] is not None:
+                vec = stack[level] + vec
+                stack[level] = None
+                level += 1
+            if level == len(stack):
+                stack.append(vec)
+            else:
+                stack[level] = vec
+        self.count += 1
+
+    def add_blobs(self, blobs):
+        self.add([ts.bfv_vector_from(self.ctx, b) for b in blobs])
+
+    def merge(self, other):
+        """合并另一个 (例如其他工作进程的) 归并结果。"""
+        if other.count:
+            self.add(other.result(serialize=False))
+            self.count += other.count - 1
+
+    def result(self, serialize=True):
+        if not self.count:
+            raise ValueError("没有任何输入")
+        out = []
+        for stack in self.levels:
+            partial = [vec for vec in stack if vec is not None]
+            total = partial[0]
+            for vec in partial[1:]:
+                total = total + vec
+            out.append(total.serialize() if serialize else total)
+        return out
+
+
+def reduce_blobs(ctx, client_blobs, n_chunks):
+    """在工作进程中归并一个分片 (可配合 tenseal_scheduler.Scheduler.submit 使用)。"""
+    reducer = TreeReducer(ctx, n_chunks)
+    for blobs in client_blobs:
+        reducer.add_blobs(blobs)
+    return reducer.result(), reducer.count
+
+
+def decrypt_aggregate(ctx, blobs, layout, plain_modulus, signed=False):
+    """
+    私钥持有方: 解密并拆出 (counts, sums)。
+    计数总是非负，按 [0, t) 解码；signed=True 时求和按中心化区间 [-t/2, t/2) 解码。
+    """
+    t = plain_modulus
+    raw = np.array([ts.bfv_vector_from(ctx, b).decrypt() for b in blobs], dtype=np.int64)
+    counts, sums = layout.unpack(np.mod(raw, t))
+    if signed:
+        sums = np.where(sums >= (t + 1) // 2, sums - t, sums)
+    return counts, sums
+
+
+# ==============================================================================
+# 由直方图推导 (Derived Statistics)
+# ==============================================================================
+
+def histogram_percentiles(counts, edges, qs):
+    """
+    由分桶计数与桶边界 (len(edges) = len(counts) + 1) 估计分位数 (qs ∈ [0, 100])。
+    先定位累积计数跨过 q% 的桶，再在桶内线性插值；误差不超过一个桶宽。
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.float64)
+    cum = np.cumsum(counts)
+    total = cum[-1]
+    out = []
+    for q in np.atleast_1d(qs):
+        target = q / 100 * total
+        i = min(int(np.searchsorted(cum, target, side="left")), len(counts) - 1)
+        before = cum[i - 1] if i else 0.0
+        frac = (target - before) / counts[i] if counts[i] else 0.0
+        out.append(edges[i] + frac * (edges[i + 1] - edges[i]))
+    return np.array(out)
+
+
+def group_means(counts, sums, value_scale=1):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts[:, None] > 0, sums / counts[:, None] / value_scale, np.nan)
+
+
+if __name__ == "__main__":
+    print(">>> [模块] BFV 加密聚合: 直方图 / 分位数 / 分组统计")
+
+    rng = np.random.default_rng(0)
+    n_clients, records_per_client = 1000, 1000
+    n_groups, max_value = 2000, 100
+    n_records = n_clients * records_per_client
+    slots = CONFIG_VOTING["poly_modulus_degree"]
+
+    # ==========================================================================
+    # A. GROUP BY: 2000 个组的计数与求和 (100 万条记录)
+    # ==========================================================================
+    print(f"\n--- A. GROUP BY: {n_groups} 组, {n_records} 条记录, {n_clients} 个客户端 ---")
+    layout = PackedLayout(n_groups, n_values=1, slots=slots)
+    ctx, t = create_aggregation_context(n_records, max_value)
+    print(f"明文模数: {t} ({t.bit_length()} bits, CONFIG_VOTING 为 {CONFIG_VOTING['plain_modulus']}), "
+          f"每个客户端 {layout.n_chunks} 个密文")
+    public_ctx = ts.context_from(ctx.serialize(save_secret_key=False))
+
+    groups = rng.zipf(1.3, n_records) % n_groups
+    values = rng.integers(0, max_value + 1, n_records)
+
+    start = time.perf_counter()
+    client = AggregationClient(public_ctx, layout)
+    uploads = [client.encrypt(groups[i::n_clients], values[i::n_clients]) for i in range(n_clients)]
+    client_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reducer = TreeReducer(public_ctx, layout.n_chunks)
+    for blobs in uploads:
+        reducer.add_blobs(blobs)
+    result = reducer.result()
+    server_time = time.perf_counter() - start
+
+    counts, sums = decrypt_aggregate(ctx, result, layout, t)
+    exp_counts = np.bincount(groups, minlength=n_groups)
+    exp_sums = np.bincount(groups, weights=values, minlength=n_groups)
+    print(f"客户端编码+加密: {client_time:.2f}s | 服务端归并: {server_time:.2f}s "
+          f"({n_records / server_time / 1e6:.1f}M 记录/s)")
+    print(f"计数一致: {np.array_equal(counts, exp_counts)} | 求和一致: {np.array_equal(sums[:, 0], exp_sums)}")
+    top = np.argsort(counts)[::-1][:3]
+    means = group_means(counts, sums)[:, 0]
+    print("Top 3 组: " + ", ".join(f"#{g}: {counts[g]} 条, 均值 {means[g]:.2f}" for g in top))
+
+    # ==========================================================================
+    # B. 直方图与分位数 (年龄分布)
+    # ==========================================================================
+    print("\n--- B. 直方图与分位数 ---")
+    ages = np.clip(rng.normal(40, 12, n_records), 0, 99.999)
+    edges = np.arange(0, 101, 1.0)
+    hist_layout = PackedLayout(len(edges) - 1, slots=slots)
+    hist_ctx, hist_t = create_aggregation_context(n_records)
+    hist_public = ts.context_from(hist_ctx.serialize(save_secret_key=False))
+    hist_client = AggregationClient(hist_public, hist_layout)
+
+    hist_reducer = TreeReducer(hist_public, hist_layout.n_chunks)
+    for i in range(n_clients):
+        buckets = np.digitize(ages[i::n_clients], edges) - 1
+        hist_reducer.add_blobs(hist_client.encrypt(buckets))
+    hist, _ = decrypt_aggregate(hist_ctx, hist_reducer.result(), hist_layout, hist_t)
+
+    qs = [50, 90, 99]
+    est = histogram_percentiles(hist, edges, qs)
+    exact = np.percentile(ages, qs)
+    for q, e, x in zip(qs, est, exact):
+        print(f"P{q}: 加密直方图估计 {e:.2f} | 明文精确值 {x:.2f} | 误差 {abs(e - x):.3f} (桶宽 1.0)")
@@ -1,4 +1,4 @@
-import tenseal as ts
+from tenseal_backend import ts
 import numpy as np
 
 print(">>> [模块] 精确整数计算：BFV 方案演示 (v0.3.16)")
@@ -1,4 +1,4 @@
-import tenseal as ts
+from tenseal_backend import ts
 import numpy as np
 import math
 
@@ -1,4 +1,4 @@
-import tenseal as ts
+from tenseal_backend import ts
 
 print(">>> [模块] CKKS 基础与高阶算术演示 (v0.3.16 修正版)")
 
@@ -1,5 +1,10 @@
-import tenseal as ts
+import time
+
+from tenseal_backend import ts
 import numpy as np
+from numpy_io import plain_tensor
+from rotation_sharing import matmul_columns, measure_costs, plan_matmul
+from tenseal_config import context_slots
 
 print(">>> [模块] 神经网络核心：全连接层演示 ")
 
@@ -86,10 +91,21 @@ class EncryptedLinear:
 
         return out
 
+    def forward_columns(self, enc_columns):
+        """
+        列打包前向传播: enc_columns[i] 是第 i 个输入特征在一批样本上的密文 (样本沿槽位打包)，
+        返回每个输出特征一个密文。只做标量乘与加法，没有旋转 (见 rotation_sharing.py)。
+        """
+        outs = matmul_columns(enc_columns, self.weight)
+        if self.bias is not None:
+            for out, b in zip(outs, np.ravel(self.bias)):
+                out.add_(float(b))
+        return outs
+
 
 # 模拟：5 输入 -> 3 输出
-W_sim = np.random.uniform(-1, 1, size=(5, 3)).tolist()
-b_sim = np.random.uniform(-0.5, 0.5, size=(3,)).tolist()
+W_sim = plain_tensor(np.random.uniform(-1, 1, size=(5, 3)))
+b_sim = plain_tensor(np.random.uniform(-0.5, 0.5, size=(3,)))
 
 layer = EncryptedLinear(W_sim, b_sim)
 in_data = [1.0, 2.0, 3.0, 4.0, 5.0]
@@ -139,4 +155,31 @@ result = out.decrypt()[0]
 print("-" * 30)
 print(f"多层网络预测值: {result:.4f}")
 print(f"预期值: 29.0000")
-print("-" * 30)
\ No newline at end of file
+print("-" * 30)
+
+# ==============================================================================
+# 5. 批量推理: 对角线法 vs 列打包 (Batch Inference)
+# ==============================================================================
+print("\n--- D. 批量推理: 256 个样本, 16 -> 4 ---")
+# 逐样本 matmul 每个样本要做 n_in - 1 次旋转；样本沿槽位打包后只需标量乘与加法。
+# plan_matmul 用本机实测的旋转 / 标量乘 / 加法耗时选择方案。
+n_in, n_out, n_samples = 16, 4, 256
+X_batch = np.random.uniform(-1, 1, size=(n_samples, n_in))
+W_batch = np.random.uniform(-1, 1, size=(n_in, n_out))
+b_batch = np.random.uniform(-0.5, 0.5, size=(n_out,))
+batch_layer = EncryptedLinear(W_batch.tolist(), b_batch.tolist())
+
+costs = measure_costs(ctx, size=1024)
+plan, estimates = plan_matmul(n_in, n_out, n_samples, context_slots(ctx), costs)
+print("代价模型: " + ", ".join(f"{k} ≈ {v:.2f}s" for k, v in estimates.items()) + f" -> 选择 {plan}")
+
+start = time.perf_counter()
+if plan == "columns":
+    enc_cols = [ts.ckks_vector(ctx, X_batch[:, i].tolist()) for i in range(n_in)]
+    batch_pred = np.array([o.decrypt() for o in batch_layer.forward_columns(enc_cols)]).T
+else:
+    batch_pred = np.array([batch_layer.forward(ts.ckks_vector(ctx, row.tolist())).decrypt() for row in X_batch])
+elapsed = time.perf_counter() - start
+
+batch_err = np.max(np.abs(batch_pred - (X_batch.dot(W_batch) + b_batch)))
+print(f"{plan}: {n_samples} 个样本耗时 {elapsed:.2f}s (含加密/解密) | 最大误差 {batch_err:.1e}")
@@ -0,0 +1,302 @@
+"""
+CKKS 加密逻辑回归引擎 (Encrypted Logistic Regression)
+---------------------------------------------------------
+基于 CONFIG_LR (Degree 8192, 乘法深度 3) 的批量推理与小批量梯度下降训练。
+
+打包方式 (列打包 / Column Packing):
+    一个 mini-batch 最多容纳 8192 / 2 = 4096 个样本。
+    每个特征列 x_j 加密为一个密文，第 i 个槽位存放第 i 个样本的 x_ij。
+    额外加密一列全 1 (偏置列)，padding 槽位为 0，因此它同时充当样本掩码。
+    这样一次密文运算同时处理 4096 个样本，而不是每个样本一个密文。
+
+深度预算 (CONFIG_LR 恰好 3 层):
+    推理: z = Σ x_j * w_j (1 层) -> 3 次多项式 Sigmoid (polyval 消耗 2 层) = 3 层
+    训练: 梯度 g_j = mean_i x_ij * (σ(z_i) - y_i)
+          最深项 c3 * z^3 * x_j 被拆成 z^2 * (z * (c3/n * x_j))，恰好 3 层。
+          与权重无关的项 (c0 - y) * x_j 每个 batch 只算一次并缓存。
+
+梯度归约 (reduce, 见 rotation_sharing.py):
+    server: 服务端对每个特征做一次 sum() (log2(n) 次旋转)，客户端解密标量
+    client: 服务端返回未求和的向量，客户端解密后用 NumPy 求和，服务端无旋转
+            (客户端会看到每个样本对梯度的贡献，前提见 ckks_refresh.py 的安全说明)
+
+协议 (与 Key_Separation.py 的角色一致):
+    客户端 (持有私钥) 加密数据与当前权重；服务端盲算加密梯度；
+    客户端解密梯度并在明文中更新权重。每一步的解密/重加密也就顺带“刷新”了密文层级，
+    所以 3 层深度足够跑任意多个 epoch。
+
+使用方法:
+    from ckks_logistic_regression import EncryptedLogisticRegression
+    model = EncryptedLogisticRegression(n_features=8)
+    batches = model.encrypt_dataset(X, y)
+    model.fit(batches, epochs=5, lr=1.0)
+    proba = model.predict_proba(model.encrypt_dataset(X_test))
+"""
+
+import time
+
+import numpy as np
+
+from rotation_sharing import MODES, SharedReduction, finish
+from tenseal_backend import ts
+from tenseal_config import CONFIG_LR, create_context
+
+# Sigmoid 在 [-5, 5] 区间的 3 次近似 (与 ckks_activation_demo.py 相同)
+# f(x) ≈ 0.5 + 0.197x - 0.004x^3, 系数升序排列
+SIGMOID_COEFFS = [0.5, 0.197, 0.0, -0.004]
+
+
+def poly_sigmoid(x, coeffs=SIGMOID_COEFFS):
+    """明文版本的多项式 Sigmoid，用于基线对比。"""
+    return np.polynomial.polynomial.polyval(x, coeffs)
+
+
+class EncryptedBatch:
+    """
+    一个列打包的加密 mini-batch。
+
+    columns[0] 为偏置列 (掩码)，columns[1:] 为各特征列；labels 为加密标签 (推理时为 None)。
+    训练用到的、与权重无关的中间密文缓存在 _cache 中。
+    """
+
+    def __init__(self, columns, n_samples, labels=None):
+        self.columns = columns
+        self.n_samples = n_samples
+        self.labels = labels
+        self._cache = None
+
+
+class EncryptedLogisticRegression:
+    def __init__(self, n_features, context=None, batch_size=None, sigmoid_coeffs=SIGMOID_COEFFS, reduce="server"):
+        if len(sigmoid_coeffs) != 4 or sigmoid_coeffs[2] != 0:
+            raise ValueError("sigmoid_coeffs 必须是形如 [c0, c1, 0, c3] 的奇对称 3 次多项式")
+        if reduce not in MODES:
+            raise ValueError(f"reduce 必须是 {MODES} 之一")
+
+        self.ctx = context if context is not None else create_context(CONFIG_LR)
+        self.batch_size = batch_size or CONFIG_LR["poly_modulus_degree"] // 2
+        self.n_features = n_features
+        self.sigmoid_coeffs = list(sigmoid_coeffs)
+        self.reduce = reduce
+
+        # theta[0] 为偏置，theta[1:] 为特征权重 (明文，由私钥持有方维护)
+        self.theta = np.zeros(n_features + 1)
+
+    @property
+    def weight(self):
+        return self.theta[1:]
+
+    @property
+    def bias(self):
+        return self.theta[0]
+
+    # ------------------------------------------------------------------
+    # 客户端: 加密 (Encrypt)
+    # ------------------------------------------------------------------
+    def encrypt_batch(self, X, y=None):
+        """
+        将 (n, n_features) 的明文数据列打包加密为一个 EncryptedBatch。
+        n 不能超过 batch_size，不足部分以 0 填充。
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n = X.shape[0]
+        if n > self.batch_size:
+            raise ValueError(f"batch 过大: {n} > {self.batch_size} slots")
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"特征维度不匹配: {X.shape[1]} != {self.n_features}")
+
+        packed = np.zeros((self.n_features + 1, n))
+        packed[0] = 1.0
+        packed[1:] = X.T
+        columns = [ts.ckks_vector(self.ctx, col.tolist()) for col in packed]
+
+        labels = None
+        if y is not None:
+            labels = ts.ckks_vector(self.ctx, np.asarray(y, dtype=np.float64).tolist())
+        return EncryptedBatch(columns, n, labels)
+
+    def encrypt_dataset(self, X, y=None):
+        """按 batch_size 切分并加密整个数据集，返回 EncryptedBatch 列表。"""
+        batches = []
+        for start in range(0, len(X), self.batch_size):
+            stop = start + self.batch_size
+            batches.append(self.encrypt_batch(X[start:stop], None if y is None else y[start:stop]))
+        return batches
+
+    def _encrypt_theta(self, n_samples):
+        # 每个权重复制到 batch 的全部槽位，使 x_j * w_j 成为逐槽乘法
+        return [ts.ckks_vector(self.ctx, [float(t)] * n_samples) for t in self.theta]
+
+    # ------------------------------------------------------------------
+    # 服务端: 推理 (Inference)
+    # ------------------------------------------------------------------
+    def forward_encrypted(self, batch):
+        """
+        明文权重 + 加密数据的批量推理，返回加密概率向量 (消耗全部 3 层深度)。
+        """
+        z = batch.columns[0] * float(self.theta[0])
+        for col, w in zip(batch.columns[1:], self.theta[1:]):
+            z.add_(col * float(w))
+        return z.polyval(self.sigmoid_coeffs)
+
+    def predict_proba(self, batches):
+        """对多个加密 batch 推理并解密 (解密一步仅客户端可执行)。"""
+        return np.concatenate([
+            np.array(self.forward_encrypted(batch).decrypt()[:batch.n_samples])
+            for batch in batches
+        ])
+
+    def predict(self, batches, threshold=0.5):
+        return (self.predict_proba(batches) >= threshold).astype(np.int64)
+
+    # ------------------------------------------------------------------
+    # 服务端: 加密梯度 (Encrypted Gradient)
+    # ------------------------------------------------------------------
+    def _batch_cache(self, batch):
+        """
+        与权重无关、每个 batch 只需计算一次的密文:
+          - const_j = (c0 - y_i) * x_ij / n        (未求和, 与梯度项一起归约, 2 层)
+          - x_j * c1 / n 与 x_j * c3 / n           (1 层)
+        """
+        if batch._cache is None:
+            if batch.labels is None:
+                raise ValueError("训练 batch 缺少加密标签")
+            c0, c1, _, c3 = self.sigmoid_coeffs
+            inv_n = 1.0 / batch.n_samples
+            scaled_c1, scaled_c3, const = [], [], []
+            for col in batch.columns:
+                col_n = col * inv_n
+                const.append(col_n * c0 - col_n * batch.labels)
+                scaled_c1.append(col * (c1 * inv_n))
+                scaled_c3.append(col * (c3 * inv_n))
+            batch._cache = (scaled_c1, scaled_c3, const)
+        return batch._cache
+
+    def encrypted_gradient(self, batch, enc_theta):
+        """
+        计算平均梯度 g_j = mean_i x_ij * (σ(z_i) - y_i)，返回 n_features + 1 个密文，
+        每个解密后用 finish() 求和得到 g_j (reduce="server" 时已是标量)。
+
+        σ(z) * x_j = c0*x_j + c1*z*x_j + c3*z^3*x_j，其中:
+          c1*z*x_j        = z * (c1/n * x_j)           -> 2 层
+          c3*z^3*x_j      = z^2 * (z * (c3/n * x_j))   -> 3 层
+        """
+        scaled_c1, scaled_c3, const = self._batch_cache(batch)
+
+        # z = Σ x_j * w_j (密文 x 密文, 1 层)
+        z = batch.columns[0] * enc_theta[0]
+        for col, w in zip(batch.columns[1:], enc_theta[1:]):
+            z.add_(col * w)
+        z_sq = z.square()
+
+        grads = []
+        for c1_col, c3_col, c in zip(scaled_c1, scaled_c3, const):
+            term = z_sq * (z * c3_col)
+            term.add_(z * c1_col)
+            # 常数项与梯度项共享一次旋转树 (client 模式下不做旋转)
+            grads.append(SharedReduction(self.reduce).add(term).add(c).result())
+        return grads
+
+    # ------------------------------------------------------------------
+    # 训练循环 (Training Loop)
+    # ------------------------------------------------------------------
+    def fit(self, batches, epochs=3, lr=1.0, verbose=True):
+        """
+        加密小批量梯度下降。每一步:
+          1. [客户端] 加密当前权重
+          2. [服务端] 计算加密梯度
+          3. [客户端] 解密梯度，明文更新 theta
+        """
+        for epoch in range(epochs):
+            start = time.perf_counter()
+            for batch in batches:
+                enc_theta = self._encrypt_theta(batch.n_samples)
+                grads = self.encrypted_gradient(batch, enc_theta)
+                self.theta -= lr * np.array([finish(g.decrypt()) for g in grads])
+            if verbose:
+                elapsed = time.perf_counter() - start
+                n = sum(b.n_samples for b in batches)
+                print(f"  Epoch {epoch + 1}/{epochs}: {elapsed:.2f}s ({n / elapsed:.0f} samples/s)")
+        return self
+
+
+def fit_plain(X, y, epochs, lr, batch_size, coeffs=SIGMOID_COEFFS):
+    """与加密训练完全相同的明文小批量梯度下降，作为精度基线。"""
+    theta = np.zeros(X.shape[1] + 1)
+    for _ in range(epochs):
+        for start in range(0, len(X), batch_size):
+            xb = np.hstack([np.ones((len(X[start:start + batch_size]), 1)), X[start:start + batch_size]])
+            yb = y[start:start + batch_size]
+            theta -= lr * xb.T.dot(poly_sigmoid(xb.dot(theta), coeffs) - yb) / len(xb)
+    return theta
+
+
+if __name__ == "__main__":
+    print(">>> [模块] 加密逻辑回归: 批量推理与训练基准 (CONFIG_LR)")
+
+    # ==========================================================================
+    # 1. 合成数据集 (Synthetic Dataset)
+    # ==========================================================================
+    rng = np.random.default_rng(42)
+    n_features = 8
+    n_train, n_test = 8192, 4096
+    true_w = rng.normal(0, 1, n_features)
+
+    X_all = rng.normal(0, 1, (n_train + n_test, n_features))
+    y_all = (X_all.dot(true_w) + rng.normal(0, 0.5, len(X_all)) > 0).astype(np.float64)
+    X_train, y_train = X_all[:n_train], y_all[:n_train]
+    X_test, y_test = X_all[n_train:], y_all[n_train:]
+
+    epochs, lr = 5, 1.0
+
+    # ==========================================================================
+    # 2. 环境准备
+    # ==========================================================================
+    start = time.perf_counter()
+    model = EncryptedLogisticRegression(n_features)
+    print(f"✅ Context 创建完成: Degree={CONFIG_LR['poly_modulus_degree']}, "
+          f"Batch={model.batch_size} ({time.perf_counter() - start:.2f}s)")
+
+    # ==========================================================================
+    # 3. 加密训练
+    # ==========================================================================
+    print(f"\n--- A. 加密训练 ({n_train} 样本, {n_features} 特征, {epochs} epochs) ---")
+    start = time.perf_counter()
+    train_batches = model.encrypt_dataset(X_train, y_train)
+    enc_time = time.perf_counter() - start
+    print(f"加密训练集: {enc_time:.2f}s ({n_train / enc_time:.0f} samples/s)")
+
+    start = time.perf_counter()
+    model.fit(train_batches, epochs=epochs, lr=lr)
+    train_time = time.perf_counter() - start
+    print(f"训练总耗时: {train_time:.2f}s ({n_train * epochs / train_time:.0f} samples/s)")
+
+    plain_theta = fit_plain(X_train, y_train, epochs, lr, model.batch_size)
+    print(f"加密权重与明文权重最大偏差: {np.max(np.abs(model.theta - plain_theta)):.6f}")
+
+    # ==========================================================================
+    # 4. 加密推理
+    # ==========================================================================
+    print(f"\n--- B. 加密批量推理 ({n_test} 样本) ---")
+    test_batches = model.encrypt_dataset(X_test)
+
+    start = time.perf_counter()
+    enc_out = [model.forward_encrypted(b) for b in test_batches]
+    infer_time = time.perf_counter() - start
+
+    he_proba = np.concatenate([np.array(o.decrypt()[:b.n_samples]) for o, b in zip(enc_out, test_batches)])
+    plain_proba = poly_sigmoid(np.hstack([np.ones((n_test, 1)), X_test]).dot(model.theta))
+
+    print(f"服务端推理耗时: {infer_time:.3f}s ({n_test / infer_time:.0f} samples/s)")
+    print(f"概率最大误差 (HE vs 明文): {np.max(np.abs(he_proba - plain_proba)):.2e}")
+
+    # ==========================================================================
+    # 5. 精度对比
+    # ==========================================================================
+    he_acc = np.mean((he_proba >= 0.5) == y_test)
+    plain_acc = np.mean((poly_sigmoid(np.hstack([np.ones((n_test, 1)), X_test]).dot(plain_theta)) >= 0.5) == y_test)
+
+    print("-" * 30)
+    print(f"加密训练 + 加密推理准确率: {he_acc:.4f}")
+    print(f"明文训练 + 明文推理准确率: {plain_acc:.4f}")
+    print("-" * 30)
@@ -0,0 +1,281 @@
+"""
+交互式密文刷新协议 (Client-Assisted Refresh)
+---------------------------------------------------------
+TenSEAL 没有 Bootstrapping，CKKS 密文每做一次乘法就消耗一层模数链，用完即无法继续计算。
+CONFIG_DNN 只能靠 Degree 16384 + 6 层中间素数硬撑，每个操作的代价约为 Degree 8192 的 4 倍。
+
+本模块用一次与私钥持有方的交互代替 Bootstrapping:
+    1. [服务端] 密文层级即将耗尽时，加上随机掩码 r:  ct' = ct + Enc(r) (加法，不消耗深度)
+    2. [客户端] 解密 ct' 得到 x + r，重新加密为顶层密文后回传
+    3. [服务端] 减去掩码: x = (x + r) - r，得到顶层的新密文
+
+运行时 (RefreshRuntime) 只在“下一阶段所需深度 > 剩余深度”时才刷新 (惰性刷新)，
+并把同一时刻需要刷新的多个密文合并为一次往返，从而让深层网络跑在 CONFIG_LR 大小的 Context 上。
+运行时同时记录实测的单层运算与单次往返耗时，decide() 据此判断 "小 Context + 刷新" 与
+"深 Context 不刷新" 哪个更划算 (深 Context 的单层耗时由调用方提供，例如一次实测)。
+
+安全说明 (其他“由私钥持有方解密中间结果”的协议也以本节为准):
+    CKKS 的可表示范围受顶层素数限制 (CONFIG_LR 为 2^50 / 2^40 ≈ ±512)，
+    因此掩码只能提供有界的统计隐藏 (mask_bound 越大隐藏越好，但不可超过可表示范围)。
+    私钥持有方看到的中间值都只是其自身数据的函数: 客户端本来就是数据所有者时
+    (Key_Separation.py 的场景) 不构成额外泄露；数据来自第三方时，这类协议都不适用。
+
+使用方法:
+    key_holder = KeyHolder(client_ctx.serialize(save_secret_key=True))
+    runtime = RefreshRuntime(server_ctx, key_holder)
+    out = runtime.run(enc_x, [(layer1, 1), (square, 1), (layer2, 1)])
+"""
+
+import time
+
+import numpy as np
+
+from tenseal_backend import ts
+
+def remaining_depth(vec):
+    """
+    密文还能承受的乘法次数 (= 当前模数链中剩余的数据素数个数 - 1)。
+    新加密的 CONFIG_LR 密文返回 3，耗尽时返回 0。
+    """
+    return vec.ciphertext()[0].coeff_modulus_size() - 1
+
+
+class KeyHolder:
+    """
+    私钥持有方 (客户端) 的本地替身。
+
+    只通过 bytes 与服务端交互，模拟网络边界；生产环境中 refresh() 对应一次 RPC。
+    """
+
+    def __init__(self, secret_context_bytes):
+        self.ctx = ts.context_from(secret_context_bytes)
+        if not self.ctx.has_secret_key():
+            raise ValueError("KeyHolder 需要带私钥的 Context")
+
+    def refresh(self, blobs):
+        """解密一批被掩码的密文并以顶层重新加密。"""
+        fresh = []
+        for blob in blobs:
+            values = ts.ckks_vector_from(self.ctx, blob).decrypt()
+            fresh.append(ts.ckks_vector(self.ctx, values).serialize())
+        return fresh
+
+
+class RefreshRuntime:
+    """
+    服务端刷新运行时。
+
+    key_holder 只需实现 refresh(list[bytes]) -> list[bytes]。
+    stats 记录刷新次数、往返次数、传输字节数与耗时，以及 run() 中各阶段的运算耗时与深度，
+    decide() 用这些实测值判断刷新是否划算。
+    """
+
+    def __init__(self, context, key_holder, mask_bound=100.0, seed=None):
+        self.ctx = context
+        self.key_holder = key_holder
+        self.mask_bound = mask_bound
+        self.rng = np.random.default_rng(seed)
+        self.stats = {"refreshes": 0, "round_trips": 0, "bytes_sent": 0, "bytes_received": 0, "seconds": 0.0,
+                      "op_seconds": 0.0, "op_depth": 0}
+        self._max_depth = None
+
+    @property
+    def max_depth(self):
+        """顶层密文的可用深度 (首次访问时加密一个零向量测得)。"""
+        if self._max_depth is None:
+            self._max_depth = remaining_depth(ts.ckks_vector(self.ctx, [0.0]))
+        return self._max_depth
+
+    # ------------------------------------------------------------------
+    # 刷新 (Refresh)
+    # ------------------------------------------------------------------
+    def refresh_many(self, vectors):
+        """一次往返刷新多个密文，返回顶层的新密文列表。"""
+        if not vectors:
+            return []
+        start = time.perf_counter()
+
+        # 掩码用公钥加密而不是按明文相加: TenSEAL 加密时会把向量复制填满所有槽位，
+        # 明文掩码只占前 size 个槽位，减回去后其余槽位会残留 r，破坏后续的 matmul 旋转。
+        # 加掩码时 auto_mod_switch 会原地降低掩码密文的层级，所以加/减各加密一次
+        # (比 copy() 便宜得多，copy() 会连同 Galois Keys 深拷贝整个 Context)。
+        masks, blobs = [], []
+        for vec in vectors:
+            mask = self.rng.uniform(-self.mask_bound, self.mask_bound, vec.size()).tolist()
+            masks.append(mask)
+            blobs.append((vec + ts.ckks_vector(self.ctx, mask)).serialize())
+
+        fresh_blobs = self.key_holder.refresh(blobs)
+
+        fresh = []
+        for blob, mask in zip(fresh_blobs, masks):
+            vec = ts.ckks_vector_from(self.ctx, blob)
+            vec.sub_(ts.ckks_vector(self.ctx, mask))
+            fresh.append(vec)
+
+        self.stats["refreshes"] += len(vectors)
+        self.stats["round_trips"] += 1
+        self.stats["bytes_sent"] += sum(len(b) for b in blobs)
+        self.stats["bytes_received"] += sum(len(b) for b in fresh_blobs)
+        self.stats["seconds"] += time.perf_counter() - start
+        return fresh
+
+    def refresh(self, vec):
+        return self.refresh_many([vec])[0]
+
+    def ensure_depth(self, vectors, depth):
+        """
+        惰性刷新: 仅刷新剩余深度不足 depth 的密文，并合并为一次往返。
+        """
+        stale = [i for i, vec in enumerate(vectors) if remaining_depth(vec) < depth]
+        if not stale:
+            return list(vectors)
+        fresh = self.refresh_many([vectors[i] for i in stale])
+        out = list(vectors)
+        for i, vec in zip(stale, fresh):
+            out[i] = vec
+        return out
+
+    # ------------------------------------------------------------------
+    # 流水线执行 (Pipeline)
+    # ------------------------------------------------------------------
+    def run(self, vec, stages):
+        """
+        依次执行 stages = [(fn, depth), ...]，fn 接收并返回一个密文，depth 为它消耗的乘法深度。
+        每个阶段开始前按需刷新；执行前先校验每个阶段的深度不超过 Context 的最大深度。
+        """
+        plan_refreshes([depth for _, depth in stages], self.max_depth)
+        for fn, depth in stages:
+            vec = self.ensure_depth([vec], depth)[0]
+            start = time.perf_counter()
+            vec = fn(vec)
+            self.stats["op_seconds"] += time.perf_counter() - start
+            self.stats["op_depth"] += depth
+        return vec
+
+    # ------------------------------------------------------------------
+    # 决策 (Decision)
+    # ------------------------------------------------------------------
+    def measured_costs(self):
+        """实测的 (单层运算耗时, 单次刷新往返耗时)，单位秒；尚无数据时为 None。"""
+        if not self.stats["op_depth"] or not self.stats["round_trips"]:
+            return None
+        return (self.stats["op_seconds"] / self.stats["op_depth"],
+                self.stats["seconds"] / self.stats["round_trips"])
+
+    def decide(self, stage_depths, deep_max_depth, deep_op_seconds, rtt=0.0):
+        """
+        用实测代价比较本 Context + 刷新与一个更深的 Context (不刷新)。
+        rtt 为每次往返额外的网络延迟。返回 {"choice": "refresh" | "deep", "refresh_cost", "deep_cost"}。
+        """
+        costs = self.measured_costs()
+        if costs is None:
+            raise RuntimeError("尚无实测代价: 先用 run() 执行至少一次包含刷新的流水线")
+        op_seconds, refresh_seconds = costs
+        refresh_cost = estimate_cost(stage_depths, self.max_depth, op_seconds, refresh_seconds + rtt)
+        deep_cost = estimate_cost(stage_depths, deep_max_depth, deep_op_seconds, 0.0)
+        return {"choice": "refresh" if refresh_cost < deep_cost else "deep",
+                "refresh_cost": refresh_cost, "deep_cost": deep_cost}
+
+
+# ==============================================================================
+# 刷新规划与代价估计 (Planning)
+# ==============================================================================
+
+def plan_refreshes(stage_depths, max_depth):
+    """
+    给定各阶段的深度需求与 Context 的最大深度，返回需要在其之前刷新的阶段下标。
+    对于串行流水线，“不够才刷”的贪心策略即为最少刷新次数。
+    """
+    if any(d > max_depth for d in stage_depths):
+        raise ValueError(f"单个阶段深度超过 Context 最大深度 {max_depth}，无法通过刷新解决")
+    plan, left = [], max_depth
+    for i, depth in enumerate(stage_depths):
+        if depth > left:
+            plan.append(i)
+            left = max_depth
+        left -= depth
+    return plan
+
+
+def estimate_cost(stage_depths, max_depth, op_seconds, refresh_seconds):
+    """
+    估算流水线总耗时: Σ 各阶段耗时 + 刷新次数 × 单次刷新往返耗时。
+    op_seconds 为该 Context 下单层运算的平均耗时，refresh_seconds 包含网络往返。
+    用于比较“小 Context + 刷新”与“大 Context 不刷新”哪个更划算。
+    """
+    n_refresh = len(plan_refreshes(stage_depths, max_depth))
+    return sum(stage_depths) * op_seconds + n_refresh * refresh_seconds
+
+
+if __name__ == "__main__":
+    from tenseal_config import CONFIG_DNN, CONFIG_LR, create_context
+
+    print(">>> [模块] 交互式刷新: 在 CONFIG_LR 上运行深层网络")
+
+    # 6 层深度的网络: (Linear -> Square) x 3
+    rng = np.random.default_rng(7)
+    dims = [8, 8, 8, 4]
+    weights = [rng.uniform(-0.5, 0.5, (dims[i], dims[i + 1])) for i in range(len(dims) - 1)]
+    x = rng.uniform(-1, 1, dims[0])
+
+    stages = []
+    for w in weights:
+        stages.append((lambda v, w=w: v.matmul(w.tolist()), 1))
+        stages.append((lambda v: v.square(), 1))
+    stage_depths = [d for _, d in stages]
+
+    expected = x
+    for w in weights:
+        expected = expected.dot(w) ** 2
+
+    # ==========================================================================
+    # A. 基线: CONFIG_DNN (Degree 16384, 深度 6)，无需刷新
+    # ==========================================================================
+    print(f"\n--- A. 基线: CONFIG_DNN (Degree={CONFIG_DNN['poly_modulus_degree']}) ---")
+    dnn_ctx = create_context(CONFIG_DNN)
+    start = time.perf_counter()
+    out = ts.ckks_vector(dnn_ctx, x.tolist())
+    for fn, _ in stages:
+        out = fn(out)
+    dnn_time = time.perf_counter() - start
+    print(f"耗时: {dnn_time:.3f}s, 最大误差: {np.max(np.abs(np.array(out.decrypt()) - expected)):.2e}")
+
+    # ==========================================================================
+    # B. CONFIG_LR (Degree 8192, 深度 3) + 交互式刷新
+    # ==========================================================================
+    print(f"\n--- B. CONFIG_LR (Degree={CONFIG_LR['poly_modulus_degree']}) + 刷新 ---")
+    client_ctx = create_context(CONFIG_LR)
+    key_holder = KeyHolder(client_ctx.serialize(save_secret_key=True))
+    server_ctx = ts.context_from(client_ctx.serialize(save_secret_key=False))
+    runtime = RefreshRuntime(server_ctx, key_holder, seed=0)
+
+    max_depth = runtime.max_depth
+    print(f"刷新计划 (阶段下标): {plan_refreshes(stage_depths, max_depth)}")
+
+    enc_x = ts.ckks_vector_from(server_ctx, ts.ckks_vector(client_ctx, x.tolist()).serialize())
+    start = time.perf_counter()
+    out = runtime.run(enc_x, stages)
+    lr_time = time.perf_counter() - start
+
+    result = np.array(ts.ckks_vector_from(client_ctx, out.serialize()).decrypt())
+    print(f"耗时: {lr_time:.3f}s (其中刷新 {runtime.stats['seconds']:.3f}s), "
+          f"最大误差: {np.max(np.abs(result - expected)):.2e}")
+    print(f"刷新统计: {runtime.stats}")
+
+    # ==========================================================================
+    # C. 代价模型: 运行时用实测代价决定刷新何时划算
+    # ==========================================================================
+    print("\n--- C. 代价模型 ---")
+    dnn_op = dnn_time / sum(stage_depths)
+    for rtt in (0.0, 0.01, 0.05):
+        d = runtime.decide(stage_depths, 6, dnn_op, rtt)
+        better = "CONFIG_LR + 刷新" if d["choice"] == "refresh" else "CONFIG_DNN"
+        print(f"网络往返 {rtt * 1000:>4.0f}ms: LR+刷新 ≈ {d['refresh_cost']:.3f}s | DNN ≈ {d['deep_cost']:.3f}s "
+              f"-> 选择 {better}")
+
+    # 超过最大深度的阶段在执行前即被拒绝，不会白白发起刷新往返
+    try:
+        runtime.run(enc_x, [(lambda v: v.square().square().square().square(), 4)])
+    except ValueError as e:
+        print(f"\n深度 4 的阶段 (最大 {runtime.max_depth}): ❌ {e}")
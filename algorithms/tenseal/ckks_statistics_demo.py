@@ -1,4 +1,4 @@
-import tenseal as ts
+from tenseal_backend import ts
 import numpy as np
 
 print(">>> [模块] 线性代数与统计学基础演示 ")
@@ -1,5 +1,6 @@
-import tenseal as ts
+from tenseal_backend import ts
 import numpy as np
+from numpy_io import decrypt_tensor
 
 print(">>> [模块] 高维数据：CKKS Tensor 操作演示 ")
 
@@ -47,8 +48,8 @@ print(f"原始形状 (Shape): {enc_tensor.shape}")
 enc_bright = enc_tensor + 50
 
 print(f"原始数据:\n{np.array(plain_image)}")
-# decrypt() 返回的是 Tensor 结构，可以转为 list 或 numpy
-print(f"亮度调整后:\n{np.array(enc_bright.decrypt().tolist())}")
+# decrypt() 返回的是 Tensor 结构；decrypt_tensor 直接解密为 numpy 数组
+print(f"亮度调整后:\n{decrypt_tensor(enc_bright)}")
 
 
 # ==============================================================================
@@ -85,7 +86,7 @@ plain_mask = [
 enc_masked = enc_tensor * plain_mask
 
 print(f"遮罩矩阵:\n{np.array(plain_mask)}")
-print(f"遮罩后结果 (右侧应为0):\n{np.array(enc_masked.decrypt().tolist())}")
+print(f"遮罩后结果 (右侧应为0):\n{decrypt_tensor(enc_masked)}")
 
 
 # ==============================================================================
@@ -128,5 +129,5 @@ enc_dimmed = enc_rgb * 0.5
 
 print(f"R通道原始: {rgb_data[0]}")
 # 解密后取第一个通道
-decrypted_rgb = np.array(enc_dimmed.decrypt().tolist())
+decrypted_rgb = decrypt_tensor(enc_dimmed)
 print(f"R通道变暗: \n{decrypted_rgb[0]}")
\ No newline at end of file
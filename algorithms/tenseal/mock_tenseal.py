@@ -0,0 +1,717 @@
+"""
+NumPy 模拟后端 (Mock TenSEAL Backend)
+---------------------------------------------------------
+真实运行一次 Degree 16384 的流水线需要数秒到数分钟，无法在大规模合成数据上测试业务逻辑。
+本模块用 NumPy 以明文方式实现演示脚本用到的 TenSEAL API 子集，接口与 `import tenseal as ts` 一致:
+    context / context_from / ckks_vector / bfv_vector / ckks_tensor / *_from
+    add / sub / mul / square / pow / polyval / sum / dot / matmul / mm / serialize / decrypt
+
+保留真实后端的约束，让测试能暴露与真实运行相同的问题:
+    - 模数链总位数超过 SEAL 128-bit 上限时报 "encryption parameters are not set correctly"
+    - CKKS 乘法深度 (level) 跟踪，耗尽时报 "scale out of bounds"
+      (polyval 消耗 ceil(log2(deg+1)) 层，pow(n) 消耗 ceil(log2 n) 层，单元素广播消耗 1 层)
+    - auto_mod_switch 会原地降低较高层级操作数的层级 (与 TenSEAL 行为一致)
+    - 槽位上限: 超出后成为分块向量，matmul 不可用
+    - 缺少 Galois Keys 时 sum / dot / matmul 报错；无私钥 Context 不能解密
+    - BFV 结果按 plain_modulus 回绕到中心化区间
+    - [可选] 每次 CKKS 运算注入高斯噪声 (noise_std，或环境变量 TENSEAL_MOCK_NOISE)
+
+注意: 序列化使用 pickle，仅供测试，切勿用于不可信数据。
+
+使用方法:
+    TENSEAL_BACKEND=mock python ckks_logistic_regression.py
+    (见 tenseal_backend.py)
+"""
+
+import enum
+import math
+import os
+import pickle
+import sys
+import warnings
+
+import numpy as np
+
+__version__ = "mock"
+
+# SEAL 在 128-bit 安全级别下各多项式度数允许的最大模数链位数
+MAX_COEFF_MODULUS_BITS = {1024: 27, 2048: 54, 4096: 109, 8192: 218, 16384: 438, 32768: 881}
+
+# SEAL 为 BFV 默认选择的数据素数个数 (不含特殊素数)，用于 ciphertext().coeff_modulus_size()
+BFV_DATA_PRIMES = {1024: 1, 2048: 1, 4096: 2, 8192: 4, 16384: 8, 32768: 15}
+
+
+class SCHEME_TYPE(enum.Enum):
+    NONE = 0
+    BFV = 1
+    CKKS = 2
+
+
+class ENCRYPTION_TYPE(enum.Enum):
+    ASYMMETRIC = 0
+    SYMMETRIC = 1
+
+
+# ==============================================================================
+# Context
+# ==============================================================================
+
+class Context:
+    def __init__(self, scheme, poly_modulus_degree, plain_modulus=None, coeff_mod_bit_sizes=None,
+                 encryption_type=ENCRYPTION_TYPE.ASYMMETRIC, n_threads=None, noise_std=None):
+        if poly_modulus_degree not in MAX_COEFF_MODULUS_BITS:
+            raise ValueError("encryption parameters are not set correctly")
+        coeff_mod_bit_sizes = list(coeff_mod_bit_sizes or [])
+        if sum(coeff_mod_bit_sizes) > MAX_COEFF_MODULUS_BITS[poly_modulus_degree]:
+            raise ValueError("encryption parameters are not set correctly")
+        if scheme == SCHEME_TYPE.CKKS and len(coeff_mod_bit_sizes) < 2:
+            raise ValueError("encryption parameters are not set correctly")
+        if scheme == SCHEME_TYPE.BFV and not plain_modulus:
+            raise ValueError("encryption parameters are not set correctly")
+
+        self.scheme = scheme
+        self.poly_modulus_degree = poly_modulus_degree
+        self.plain_modulus = plain_modulus
+        self.coeff_mod_bit_sizes = coeff_mod_bit_sizes
+        self.encryption_type = encryption_type
+        self.n_threads = n_threads
+        self.noise_std = float(os.environ.get("TENSEAL_MOCK_NOISE", 0.0)) if noise_std is None else noise_std
+
+        self.global_scale = None
+        self.auto_relin = True
+        self.auto_rescale = True
+        self.auto_mod_switch = True
+
+        self._secret_key = True
+        self._galois_keys = False
+        self._relin_keys = False
+        self._rng = np.random.default_rng()
+
+    # --- 槽位与层级 ---
+    @property
+    def slot_count(self):
+        if self.scheme == SCHEME_TYPE.CKKS:
+            return self.poly_modulus_degree // 2
+        return self.poly_modulus_degree
+
+    @property
+    def top_level(self):
+        """新密文的数据素数个数 (= ciphertext().coeff_modulus_size())。"""
+        if self.scheme == SCHEME_TYPE.CKKS:
+            return len(self.coeff_mod_bit_sizes) - 1
+        return BFV_DATA_PRIMES[self.poly_modulus_degree]
+
+    # --- 密钥 ---
+    def generate_galois_keys(self, secret_key=None):
+        self._galois_keys = True
+
+    def generate_relin_keys(self, secret_key=None):
+        self._relin_keys = True
+
+    def has_galois_keys(self):
+        return self._galois_keys
+
+    def has_relin_keys(self):
+        return self._relin_keys
+
+    def has_secret_key(self):
+        return self._secret_key
+
+    def has_public_key(self):
+        return True
+
+    def is_private(self):
+        return self._secret_key
+
+    def is_public(self):
+        return not self._secret_key
+
+    def make_context_public(self, generate_galois_keys=False, generate_relin_keys=False):
+        self._secret_key = False
+        self._galois_keys |= generate_galois_keys
+        self._relin_keys |= generate_relin_keys
+
+    def secret_key(self):
+        if not self._secret_key:
+            raise ValueError("the context doesn't hold a secret_key")
+        return True
+
+    def copy(self):
+        ctx = Context.__new__(Context)
+        ctx.__dict__.update(self.__dict__)
+        ctx.coeff_mod_bit_sizes = list(self.coeff_mod_bit_sizes)
+        return ctx
+
+    # --- 序列化 ---
+    def serialize(self, save_public_key=True, save_secret_key=False, save_galois_keys=True, save_relin_keys=True):
+        state = {k: v for k, v in self.__dict__.items() if k != "_rng"}
+        state["_secret_key"] = self._secret_key and save_secret_key
+        state["_galois_keys"] = self._galois_keys and save_galois_keys
+        state["_relin_keys"] = self._relin_keys and save_relin_keys
+        return pickle.dumps(("context", state))
+
+    @classmethod
+    def load(cls, data, n_threads=None):
+        kind, state = pickle.loads(data)
+        if kind != "context":
+            raise ValueError("failed to load context")
+        ctx = cls.__new__(cls)
+        ctx.__dict__.update(state)
+        ctx._rng = np.random.default_rng()
+        if n_threads is not None:
+            ctx.n_threads = n_threads
+        return ctx
+
+    def _check_galois(self):
+        if not self._galois_keys:
+            raise ValueError("the current context doesn't hold a Galois keys")
+
+    def _noise(self, shape):
+        if self.scheme != SCHEME_TYPE.CKKS or not self.noise_std:
+            return 0.0
+        return self._rng.normal(0.0, self.noise_std, shape)
+
+
+def context(scheme, poly_modulus_degree, plain_modulus=None, coeff_mod_bit_sizes=None,
+            encryption_type=ENCRYPTION_TYPE.ASYMMETRIC, n_threads=None, noise_std=None):
+    return Context(scheme, poly_modulus_degree, plain_modulus, coeff_mod_bit_sizes,
+                   encryption_type, n_threads, noise_std)
+
+
+def context_from(data, n_threads=None):
+    return Context.load(data, n_threads)
+
+
+# ==============================================================================
+# 明文张量 (PlainTensor)
+# ==============================================================================
+
+class PlainTensor:
+    def __init__(self, data, shape=None, dtype="float"):
+        arr = np.array(data, dtype=np.float64 if dtype == "float" else np.int64)
+        self.data = arr.reshape(shape) if shape is not None else arr
+
+    @property
+    def shape(self):
+        return list(self.data.shape)
+
+    @property
+    def raw(self):
+        return self.data.ravel().tolist()
+
+    def tolist(self):
+        return self.data.tolist()
+
+    def reshape(self, shape):
+        return PlainTensor(self.data.reshape(shape))
+
+
+def plain_tensor(data, shape=None, dtype="float"):
+    return PlainTensor(data, shape, dtype)
+
+
+# ==============================================================================
+# 模拟密文 (Encrypted Objects)
+# ==============================================================================
+
+class _Ciphertext:
+    """对应 seal.Ciphertext 中被工具代码用到的部分 (层级、scale、多项式度数)。"""
+
+    def __init__(self, level, scale, degree):
+        self._level = level
+        self.scale = scale
+        self._degree = degree
+
+    def coeff_modulus_size(self):
+        return self._level
+
+    def poly_modulus_degree(self):
+        return self._degree
+
+
+def _polyval_depth(coeffs):
+    degree = len(coeffs) - 1
+    while degree > 0 and coeffs[degree] == 0:
+        degree -= 1
+    return math.ceil(math.log2(degree + 1)) if degree > 0 else 0
+
+
+class _Encrypted:
+    """向量与张量的公共实现: data 为明文 ndarray，level 为剩余数据素数个数。"""
+
+    def __init__(self, ctx, data, level=None):
+        self._ctx = ctx
+        self._data = data
+        self._level = ctx.top_level if level is None else level
+
+    # --- 基础属性 ---
+    @property
+    def _is_ckks(self):
+        return self._ctx.scheme == SCHEME_TYPE.CKKS
+
+    def context(self):
+        return self._ctx
+
+    def link_context(self, ctx):
+        self._ctx = ctx
+
+    def copy(self):
+        return type(self)(self._ctx, self._data.copy(), self._level)
+
+    def ciphertext(self):
+        scale = self._ctx.global_scale if self._is_ckks else 1.0
+        return [_Ciphertext(self._level, scale, self._ctx.poly_modulus_degree)]
+
+    def scale(self):
+        return self._ctx.global_scale
+
+    # --- 内部工具 ---
+    def _wrap_result(self, data, level):
+        data = np.asarray(data, dtype=np.float64 if self._is_ckks else np.int64)
+        if self._is_ckks:
+            data = data + self._ctx._noise(data.shape)
+        else:
+            t = self._ctx.plain_modulus
+            data = np.mod(data + t // 2, t) - t // 2
+        return type(self)(self._ctx, data, level)
+
+    def _consume(self, level, depth):
+        """消耗 depth 层乘法深度；BFV 没有模数链，不消耗。"""
+        if not self._is_ckks or depth == 0:
+            return level
+        if level - depth < 1:
+            raise ValueError("scale out of bounds")
+        return level - depth
+
+    def _align(self, other):
+        """
+        auto_mod_switch: 结果取两者中较低的层级。TenSEAL 在 self 的副本上计算，
+        只把 other 原地降到该层级，self 保持不变 (原地运算时再由 _inplace 更新)。
+        """
+        if not self._is_ckks or self._level == other._level:
+            return min(self._level, other._level)
+        if not self._ctx.auto_mod_switch:
+            raise ValueError("encrypted values are not in the same level")
+        low = min(self._level, other._level)
+        other._level = low
+        return low
+
+    def _plain(self, other):
+        if isinstance(other, PlainTensor):
+            return other.data
+        return np.asarray(other, dtype=np.float64 if self._is_ckks else np.int64)
+
+    def _inplace(self, result):
+        self._data, self._level = result._data, result._level
+        return self
+
+    def _binary(self, other, fn, depth):
+        if isinstance(other, _Encrypted):
+            a, b = self._broadcast(other)
+            level = a._align(b)
+            return self._wrap_result(fn(a._data, b._data), self._consume(level, depth))
+        return self._wrap_result(fn(self._data, self._plain(other)), self._consume(self._level, depth))
+
+    def _broadcast(self, other):
+        return self, other
+
+    # --- 运算 ---
+    def add(self, other):
+        return self._binary(other, np.add, 0)
+
+    def sub(self, other):
+        return self._binary(other, np.subtract, 0)
+
+    def mul(self, other):
+        return self._binary(other, np.multiply, 1)
+
+    def neg(self):
+        return self._wrap_result(-self._data, self._level)
+
+    def square(self):
+        return self._wrap_result(self._data * self._data, self._consume(self._level, 1))
+
+    def pow(self, power):
+        if power < 0:
+            raise ValueError("invalid argument")
+        depth = math.ceil(math.log2(power)) if power > 1 else 0
+        return self._wrap_result(self._data ** power, self._consume(self._level, depth))
+
+    def polyval(self, coeffs):
+        coeffs = list(coeffs)
+        return self._wrap_result(np.polynomial.polynomial.polyval(self._data, coeffs),
+                                 self._consume(self._level, _polyval_depth(coeffs)))
+
+    def add_(self, other):
+        return self._inplace(self.add(other))
+
+    def sub_(self, other):
+        return self._inplace(self.sub(other))
+
+    def mul_(self, other):
+        return self._inplace(self.mul(other))
+
+    def neg_(self):
+        return self._inplace(self.neg())
+
+    def square_(self):
+        return self._inplace(self.square())
+
+    def pow_(self, power):
+        return self._inplace(self.pow(power))
+
+    def polyval_(self, coeffs):
+        return self._inplace(self.polyval(coeffs))
+
+    def sum_(self, *args):
+        return self._inplace(self.sum(*args))
+
+    def dot_(self, other):
+        return self._inplace(self.dot(other))
+
+    __add__ = __radd__ = add
+    __iadd__ = add_
+    __sub__ = sub
+    __isub__ = sub_
+    __mul__ = __rmul__ = mul
+    __imul__ = mul_
+    __neg__ = neg
+    __pow__ = pow
+
+    def __rsub__(self, other):
+        return self.neg().add(other)
+
+    # --- 解密与序列化 ---
+    def _check_secret(self, secret_key=None):
+        if secret_key is None and not self._ctx.has_secret_key():
+            raise ValueError("the current context of the tensor doesn't hold a secret_key, please provide one as argument")
+
+    def serialize(self):
+        return pickle.dumps((type(self).__name__, self._data, self._level))
+
+    @classmethod
+    def load(cls, ctx, data):
+        kind, arr, level = pickle.loads(data)
+        if kind != cls.__name__:
+            raise ValueError(f"failed to load {cls.__name__}")
+        return cls(ctx, arr, level)
+
+
+class _EncryptedVector(_Encrypted):
+    def size(self):
+        return int(self._data.shape[0])
+
+    @property
+    def shape(self):
+        return [self.size()]
+
+    def _replicate(self, size):
+        return type(self)(self._ctx, np.repeat(self._data, size), self._consume(self._level, 1))
+
+    def _broadcast(self, other):
+        # 单元素密文与向量运算时需要 replicate_first_slot (掩码乘法，消耗 1 层)，
+        # 复制到新密文上，原操作数保持不变 (与 TenSEAL 一致)
+        if self.size() == other.size():
+            return self, other
+        if other.size() == 1:
+            return self, other._replicate(self.size())
+        if self.size() == 1:
+            return self._replicate(other.size()), other
+        raise ValueError("can't compute on vectors of different sizes")
+
+    def _binary(self, other, fn, depth):
+        if not isinstance(other, _Encrypted):
+            plain = self._plain(other)
+            if plain.ndim == 1 and plain.shape[0] != self.size():
+                raise ValueError("can't compute on vectors of different sizes")
+        return super()._binary(other, fn, depth)
+
+    def sum(self, axis=0):
+        self._ctx._check_galois()
+        return self._wrap_result([self._data.sum()], self._level)
+
+    def dot(self, other):
+        self._ctx._check_galois()
+        return self.mul(other).sum()
+
+    def matmul(self, matrix):
+        self._ctx._check_galois()
+        if self.size() > self._ctx.slot_count:
+            raise ValueError("can't execute matmul_plain on chunked vectors")
+        matrix = self._plain(matrix)
+        if matrix.ndim != 2 or matrix.shape[0] != self.size():
+            raise ValueError("matrix shape doesn't match with vector size")
+        return self._wrap_result(self._data.dot(matrix), self._consume(self._level, 1))
+
+    mm = matmul
+    __matmul__ = matmul
+
+    def matmul_(self, matrix):
+        return self._inplace(self.matmul(matrix))
+
+    mm_ = matmul_
+
+    def decrypt(self, secret_key=None):
+        self._check_secret(secret_key)
+        return self._data.tolist()
+
+
+class _EncryptedTensor(_Encrypted):
+    @property
+    def shape(self):
+        return list(self._data.shape)
+
+    def reshape(self, shape):
+        return type(self)(self._ctx, self._data.reshape(shape), self._level)
+
+    def reshape_(self, shape):
+        self._data = self._data.reshape(shape)
+        return self
+
+    def transpose(self, axes=None):
+        return type(self)(self._ctx, np.transpose(self._data, axes), self._level)
+
+    def transpose_(self, axes=None):
+        self._data = np.transpose(self._data, axes)
+        return self
+
+    def sum(self, axis=0):
+        # CKKSTensor 每个元素一个密文，求和只需密文加法，不需要 Galois Keys
+        return self._wrap_result(self._data.sum(axis=axis), self._level)
+
+    def dot(self, other):
+        if isinstance(other, _Encrypted):
+            level = self._align(other)
+            return self._wrap_result(np.dot(self._data, other._data), self._consume(level, 1))
+        return self._wrap_result(np.dot(self._data, self._plain(other)), self._consume(self._level, 1))
+
+    mm = matmul = dot
+    __matmul__ = dot
+
+    def mm_(self, other):
+        return self._inplace(self.mm(other))
+
+    def decrypt(self, secret_key=None):
+        self._check_secret(secret_key)
+        return PlainTensor(self._data)
+
+
+class CKKSVector(_EncryptedVector):
+    pass
+
+
+class BFVVector(_EncryptedVector):
+    def square(self):
+        # 与 TenSEAL 一致: BFVVector 没有 square
+        raise AttributeError("'_tenseal_cpp.BFVVector' object has no attribute 'square'")
+
+    def matmul(self, matrix):
+        raise AttributeError("'BFVVector' object has no attribute 'matmul'")
+
+    mm = __matmul__ = matmul
+
+
+class CKKSTensor(_EncryptedTensor):
+    pass
+
+
+class BFVTensor(_EncryptedTensor):
+    pass
+
+
+# ==============================================================================
+# 工厂函数 (Factories)
+# ==============================================================================
+
+def _vector_data(ctx, data, dtype):
+    arr = PlainTensor(data).data.ravel() if isinstance(data, PlainTensor) else np.asarray(data, dtype=dtype).ravel()
+    if arr.shape[0] > ctx.slot_count:
+        warnings.warn("The input does not fit in a single ciphertext, and some operations will be disabled.")
+    return arr.astype(dtype)
+
+
+def ckks_vector(ctx, data, scale=None):
+    if ctx.scheme != SCHEME_TYPE.CKKS:
+        raise ValueError("CKKSVector requires a CKKS context")
+    arr = _vector_data(ctx, data, np.float64)
+    return CKKSVector(ctx, arr + ctx._noise(arr.shape))
+
+
+def bfv_vector(ctx, data):
+    if ctx.scheme != SCHEME_TYPE.BFV:
+        raise ValueError("BFVVector requires a BFV context")
+    arr = _vector_data(ctx, data, np.int64)
+    t = ctx.plain_modulus
+    return BFVVector(ctx, np.mod(arr + t // 2, t) - t // 2)
+
+
+def ckks_tensor(ctx, data, scale=None, batch=False):
+    arr = data.data if isinstance(data, PlainTensor) else np.array(data, dtype=np.float64)
+    return CKKSTensor(ctx, arr + ctx._noise(arr.shape))
+
+
+def bfv_tensor(ctx, data, batch=False):
+    arr = data.data if isinstance(data, PlainTensor) else np.array(data, dtype=np.int64)
+    t = ctx.plain_modulus
+    return BFVTensor(ctx, np.mod(arr.astype(np.int64) + t // 2, t) - t // 2)
+
+
+def ckks_vector_from(ctx, data):
+    return CKKSVector.load(ctx, data)
+
+
+def bfv_vector_from(ctx, data):
+    return BFVVector.load(ctx, data)
+
+
+def ckks_tensor_from(ctx, data):
+    return CKKSTensor.load(ctx, data)
+
+
+def bfv_tensor_from(ctx, data):
+    return BFVTensor.load(ctx, data)
+
+
+# ==============================================================================
+# 与真实后端的一致性检查 (Parity Check)
+# ==============================================================================
+
+def _parity_cases():
+    """演示脚本用到的操作: 名称 -> fn(ts, ctx, bfv_ctx)，返回需要对比的 {标签: 密文}，含运算后的输入。"""
+    x_vals, y_vals, w = [0.5, -1.0, 2.0, 0.25], [1.5, 0.5, -0.5, 1.0], [[0.1, 0.2], [0.3, -0.4], [0.5, 0.6], [-0.7, 0.8]]
+
+    def pair(ts, ctx):
+        return ts.ckks_vector(ctx, x_vals), ts.ckks_vector(ctx, y_vals)
+
+    def binary(op):
+        def case(ts, ctx, bfv_ctx):
+            x, y = pair(ts, ctx)
+            return {"out": op(x, y), "x": x, "y": y}
+        return case
+
+    def broadcast(op):
+        def case(ts, ctx, bfv_ctx):
+            x = ts.ckks_vector(ctx, x_vals)
+            mu = x.sum() * (1 / len(x_vals))
+            return {"out": op(mu, x), "mu": mu, "x": x}
+        return case
+
+    def mixed_levels(op):
+        # 层级不同的两个操作数: auto_mod_switch 只降低右操作数
+        def case(ts, ctx, bfv_ctx):
+            hi, lo = pair(ts, ctx)
+            lo = lo * 1.0
+            return {"out": op(hi, lo), "hi": hi, "lo": lo}
+        return case
+
+    def inplace_sub(ts, ctx, bfv_ctx):
+        x, y = pair(ts, ctx)
+        x.sub_(y)
+        return {"x": x, "y": y}
+
+    def bfv(ts, ctx, bfv_ctx):
+        a, b = ts.bfv_vector(bfv_ctx, [10, 20, 30]), ts.bfv_vector(bfv_ctx, [1, 2, 3])
+        return {"add": a + b, "mul": a * b, "wrap": ts.bfv_vector(bfv_ctx, [600000]) * 2}
+
+    return {
+        "add": binary(lambda x, y: x + y),
+        "sub": binary(lambda x, y: x - y),
+        "mul": binary(lambda x, y: x * y),
+        "dot": binary(lambda x, y: x.dot(y)),
+        "mul_plain": binary(lambda x, y: x * y_vals),
+        "square": binary(lambda x, y: x.square()),
+        "polyval": binary(lambda x, y: x.polyval([0.5, 0.197, 0.0, -0.004])),
+        "matmul": binary(lambda x, y: x.matmul(w)),
+        "sum": binary(lambda x, y: x.sum()),
+        "mean - x": broadcast(lambda mu, x: mu - x),
+        "mean * x": broadcast(lambda mu, x: mu * x),
+        "x - mean": broadcast(lambda mu, x: x - mu),
+        "sub_ (原地)": inplace_sub,
+        "高层 + 低层": mixed_levels(lambda hi, lo: hi + lo),
+        "低层 + 高层": mixed_levels(lambda hi, lo: lo + hi),
+        "bfv": bfv,
+    }
+
+
+def _parity_contexts(ts):
+    ctx = ts.context(ts.SCHEME_TYPE.CKKS, 8192, coeff_mod_bit_sizes=[50, 40, 40, 40, 48])
+    ctx.global_scale = 2 ** 40
+    ctx.generate_galois_keys()
+    ctx.generate_relin_keys()
+    return ctx, ts.context(ts.SCHEME_TYPE.BFV, 4096, plain_modulus=1032193)
+
+
+def _snapshot(vec, is_ckks):
+    level = vec.ciphertext()[0].coeff_modulus_size() if is_ckks else None
+    return vec.size(), level, np.array(vec.decrypt())
+
+
+def parity_check(real, atol=1e-3):
+    """
+    在真实 TenSEAL (real 为其模块) 与本模拟后端上执行同一组演示操作，
+    逐个对比结果与输入的长度、层级 (CKKS) 与数值。返回不一致项 [(操作, 标签, 说明)]。
+    """
+    mock = sys.modules[__name__]
+    backends = [(real, _parity_contexts(real)), (mock, _parity_contexts(mock))]
+    mismatches = []
+    for name, case in _parity_cases().items():
+        states = []
+        for ts, (ctx, bfv_ctx) in backends:
+            out = case(ts, ctx, bfv_ctx)
+            states.append({k: _snapshot(v, name != "bfv") for k, v in out.items()})
+        expected, got = states
+        for label, (size, level, values) in expected.items():
+            m_size, m_level, m_values = got[label]
+            if (size, level) != (m_size, m_level):
+                mismatches.append((name, label, f"长度/层级 真实 {size}/{level}，模拟 {m_size}/{m_level}"))
+            elif not np.allclose(values, m_values, atol=atol):
+                mismatches.append((name, label, f"数值 真实 {values}，模拟 {m_values}"))
+    return mismatches
+
+
+if __name__ == "__main__":
+    import time
+
+    print(">>> [模块] NumPy 模拟后端")
+
+    # --- A. 深度耗尽与真实后端报相同的错误 ---
+    print("\n--- A. 深度跟踪 ---")
+    ctx = context(SCHEME_TYPE.CKKS, 8192, coeff_mod_bit_sizes=[50, 40, 40, 40, 48])
+    ctx.global_scale = 2 ** 40
+    ctx.generate_galois_keys()
+    vec = ckks_vector(ctx, [1.0, 2.0, 3.0])
+    for i in range(4):
+        try:
+            vec = vec.square()
+            print(f"第 {i + 1} 次平方: 剩余数据素数 = {vec.ciphertext()[0].coeff_modulus_size()}")
+        except ValueError as e:
+            print(f"第 {i + 1} 次平方: ❌ {e}")
+
+    # --- B. BFV 回绕 ---
+    print("\n--- B. BFV 回绕 ---")
+    bfv_ctx = context(SCHEME_TYPE.BFV, 4096, plain_modulus=1032193)
+    print(f"600000 * 2 = {(bfv_vector(bfv_ctx, [600000]) * 2).decrypt()} (mod 1032193，中心化)")
+
+    # --- C. 大规模合成数据 ---
+    print("\n--- C. 大规模合成数据 ---")
+    rng = np.random.default_rng(0)
+    n_batches, slots = 1000, ctx.slot_count
+    start = time.perf_counter()
+    total = 0.0
+    for _ in range(n_batches):
+        enc = ckks_vector(ctx, rng.uniform(-1, 1, slots))
+        total += enc.polyval([0.5, 0.197, 0.0, -0.004]).sum().decrypt()[0]
+    elapsed = time.perf_counter() - start
+    print(f"{n_batches * slots} 个样本的 sigmoid 求和: {total:.3f}, 耗时 {elapsed:.2f}s")
+
+    # --- D. 与真实后端的一致性 ---
+    print("\n--- D. 与真实 TenSEAL 的一致性 ---")
+    try:
+        import tenseal
+    except ImportError:
+        print("未安装 tenseal，跳过")
+    else:
+        mismatches = parity_check(tenseal)
+        for name, label, detail in mismatches:
+            print(f"❌ {name} [{label}]: {detail}")
+        print(f"{len(_parity_cases())} 组操作，不一致 {len(mismatches)} 项")
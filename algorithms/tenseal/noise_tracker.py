@@ -0,0 +1,351 @@
+"""
+噪声/精度预算追踪器 (Noise & Precision Budget Tracker)
+---------------------------------------------------------
+演示脚本只能在两种时刻发现问题:
+    - 深度耗尽: 运行时抛出 "scale out of bounds"
+    - 精度损失: 解密后与 NumPy 对比 (如 ckks_statistics_demo.py 中的“误差”)
+
+本模块包装 CKKSVector / CKKSTensor / BFVVector，在每次运算后记录:
+    - 剩余深度 (level) 与剩余模数链位数
+    - 当前 scale (log2) 以及整数部分可用位数 (headroom = 模数位数 - scale 位数)
+    - [可选] NumPy 影子计算 (shadow)，BFV 下按 plain_modulus 回绕
+    - [可选] 逐步解密，与影子结果对比得到真实误差与有效精度位数
+最后输出逐操作报告，用于判断参数能否安全缩小。
+
+关闭时零开销: track() 在 tracker 为 None 或未启用时直接返回原密文对象，不做任何包装。
+包装对象与原对象 API 相同，业务代码无需区分。
+
+使用方法:
+    tracker = NoiseTracker(CONFIG_LR, measure_error=True)
+    x = track(ts.ckks_vector(ctx, data), data, tracker)
+    y = (x - x.sum() * (1 / n)).square()
+    print(tracker.report())
+"""
+
+import math
+
+import numpy as np
+
+from tenseal_backend import ts
+
+
+# 密文类型在调用时才从 ts 读取，导入本模块不会加载后端
+def _bfv_types():
+    return ts.BFVVector, ts.BFVTensor
+
+
+def _enc_types():
+    return ts.CKKSVector, ts.CKKSTensor, ts.BFVVector, ts.BFVTensor
+
+
+def track(enc, plain=None, tracker=None, name="encrypt"):
+    """
+    为密文挂上追踪器。tracker 为 None 或 enabled=False 时原样返回 enc (零开销)。
+    plain 为对应的明文数据，提供后才能进行影子计算。
+    """
+    if tracker is None or not tracker.enabled:
+        return enc
+    return tracker.wrap(enc, plain, name)
+
+
+def _to_numpy(plain):
+    # CKKSTensor/BFVTensor 解密得到 PlainTensor，向量解密得到 list
+    if hasattr(plain, "tolist"):
+        plain = plain.tolist()
+    return np.array(plain, dtype=np.float64)
+
+
+class NoiseTracker:
+    """
+    config: tenseal_config 中的场景字典，用于换算模数链位数与 BFV 明文模数。
+    shadow: 是否维护 NumPy 影子计算。
+    measure_error: 是否每一步都解密对比 (需要私钥，开销大，仅用于调参)。
+    """
+
+    def __init__(self, config=None, shadow=True, measure_error=False, enabled=True):
+        config = config or {}
+        self.coeff_mod_bit_sizes = config.get("coeff_mod_bit_sizes")
+        self.plain_modulus = config.get("plain_modulus")
+        self.shadow = shadow
+        self.measure_error = measure_error
+        self.enabled = enabled
+        self.records = []
+
+    def wrap(self, enc, plain=None, name="encrypt"):
+        shadow = None
+        if self.shadow and plain is not None:
+            shadow = self._reduce(enc, np.array(plain, dtype=np.float64))
+        tracked = TrackedTensor(enc, shadow, self)
+        self._record(name, tracked)
+        return tracked
+
+    def _reduce(self, enc, shadow):
+        # BFV 影子按明文模数回绕，并与 TenSEAL 一样映射到中心化区间 [-t/2, t/2)
+        if self.plain_modulus and isinstance(enc, _bfv_types()):
+            t = self.plain_modulus
+            return np.mod(shadow + t // 2, t) - t // 2
+        return shadow
+
+    def _record(self, op, tracked):
+        enc = tracked.enc
+        # ciphertext() 每次都复制一份密文，只取一次；层级计算与 ckks_refresh.remaining_depth 相同
+        ct = enc.ciphertext()[0]
+        record = {"op": op, "level": ct.coeff_modulus_size() - 1, "scale_bits": None,
+                  "modulus_bits": None, "headroom_bits": None, "max_error": None, "precision_bits": None}
+
+        if not isinstance(enc, _bfv_types()):
+            record["scale_bits"] = math.log2(ct.scale)
+            if self.coeff_mod_bit_sizes:
+                record["modulus_bits"] = sum(self.coeff_mod_bit_sizes[:ct.coeff_modulus_size()])
+                record["headroom_bits"] = record["modulus_bits"] - record["scale_bits"]
+
+        if self.measure_error and tracked.shadow is not None:
+            actual = _to_numpy(enc.decrypt())
+            err = float(np.max(np.abs(actual - tracked.shadow))) if actual.size else 0.0
+            record["max_error"] = err
+            record["precision_bits"] = -math.log2(err) if err > 0 else math.inf
+
+        self.records.append(record)
+
+    def summary(self):
+        """汇总: 消耗的最大深度、最小 headroom、最差精度。"""
+        if not self.records:
+            return {}
+        levels = [r["level"] for r in self.records]
+        headroom = [r["headroom_bits"] for r in self.records if r["headroom_bits"] is not None]
+        precision = [r["precision_bits"] for r in self.records if r["precision_bits"] is not None]
+        return {
+            "ops": len(self.records),
+            "depth_used": max(levels) - min(levels),
+            "min_level": min(levels),
+            "min_headroom_bits": min(headroom) if headroom else None,
+            "min_precision_bits": min(precision) if precision else None,
+        }
+
+    def report(self):
+        """逐操作报告 (文本表格)。"""
+        def fmt(value, spec, width):
+            return ("-" if value is None else format(value, spec)).ljust(width)
+
+        lines = [f"{'#':<4} | {'Op':<12} | {'Level':<5} | {'Scale':<6} | {'Modulus':<7} | "
+                 f"{'Headroom':<8} | {'MaxErr':<10} | {'Bits':<5}",
+                 "-" * 82]
+        for i, r in enumerate(self.records):
+            lines.append(
+                f"{i:<4} | {r['op']:<12} | {r['level']:<5} | {fmt(r['scale_bits'], '.1f', 6)} | "
+                f"{fmt(r['modulus_bits'], 'd', 7)} | {fmt(r['headroom_bits'], '.1f', 8)} | "
+                f"{fmt(r['max_error'], '.2e', 10)} | {fmt(r['precision_bits'], '.1f', 5)}"
+            )
+        return "\n".join(lines)
+
+
+class TrackedTensor:
+    """
+    被追踪的密文。算子与 TenSEAL 原对象一致，其余属性 (size/shape/serialize...) 透传给 enc。
+    """
+
+    def __init__(self, enc, shadow, tracker):
+        self.enc = enc
+        self.shadow = shadow
+        self.tracker = tracker
+
+    def __getattr__(self, name):
+        return getattr(self.enc, name)
+
+    # ------------------------------------------------------------------
+    # 内部: 执行、影子计算、记录
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _operand(other):
+        """返回 (传给 TenSEAL 的操作数, 影子值)；未追踪的密文没有影子。"""
+        if isinstance(other, TrackedTensor):
+            return other.enc, other.shadow
+        if isinstance(other, _enc_types()):
+            return other, None
+        if isinstance(other, ts.PlainTensor):
+            return other, _to_numpy(other)
+        return other, np.array(other, dtype=np.float64)
+
+    def _apply(self, name, enc, shadow_fn, *shadow_args):
+        shadow = None
+        if self.shadow is not None and all(a is not None for a in shadow_args):
+            shadow = self.tracker._reduce(enc, np.asarray(shadow_fn(self.shadow, *shadow_args), dtype=np.float64))
+        out = TrackedTensor(enc, shadow, self.tracker)
+        self.tracker._record(name, out)
+        return out
+
+    def _binary(self, name, shadow_fn, other, inplace=False):
+        operand, shadow_other = self._operand(other)
+        if inplace:
+            getattr(self.enc, name + "_")(operand)
+            out = self._apply(name + "_", self.enc, shadow_fn, shadow_other)
+            self.shadow = out.shadow
+            return self
+        return self._apply(name, getattr(self.enc, name)(operand), shadow_fn, shadow_other)
+
+    def _unary(self, name, shadow_fn, *args, inplace=False):
+        if inplace:
+            getattr(self.enc, name + "_")(*args)
+            out = self._apply(name + "_", self.enc, lambda s: shadow_fn(s, *args))
+            self.shadow = out.shadow
+            return self
+        return self._apply(name, getattr(self.enc, name)(*args), lambda s: shadow_fn(s, *args))
+
+    def _sum_shadow(self, s, axis=0):
+        # 与 TenSEAL 一致: 向量求和得到单元素向量，张量默认沿 axis=0 求和
+        if isinstance(self.enc, (ts.CKKSVector, ts.BFVVector)):
+            return np.array([s.sum()])
+        return s.sum(axis=axis)
+
+    # ------------------------------------------------------------------
+    # 算子 (Operators)
+    # ------------------------------------------------------------------
+    def add(self, other):
+        return self._binary("add", np.add, other)
+
+    def sub(self, other):
+        return self._binary("sub", np.subtract, other)
+
+    def mul(self, other):
+        return self._binary("mul", np.multiply, other)
+
+    def dot(self, other):
+        return self._binary("dot", lambda a, b: np.atleast_1d(np.dot(a, b)), other)
+
+    def matmul(self, other):
+        return self._binary("matmul", np.matmul, other)
+
+    def mm(self, other):
+        return self._binary("mm", np.matmul, other)
+
+    def add_(self, other):
+        return self._binary("add", np.add, other, inplace=True)
+
+    def sub_(self, other):
+        return self._binary("sub", np.subtract, other, inplace=True)
+
+    def mul_(self, other):
+        return self._binary("mul", np.multiply, other, inplace=True)
+
+    def neg(self):
+        return self._unary("neg", np.negative)
+
+    def square(self):
+        return self._unary("square", np.square)
+
+    def square_(self):
+        return self._unary("square", np.square, inplace=True)
+
+    def pow(self, power):
+        return self._unary("pow", np.power, power)
+
+    def pow_(self, power):
+        return self._unary("pow", np.power, power, inplace=True)
+
+    def polyval(self, coeffs):
+        return self._unary("polyval", lambda s, c: np.polynomial.polynomial.polyval(s, c), coeffs)
+
+    def polyval_(self, coeffs):
+        return self._unary("polyval", lambda s, c: np.polynomial.polynomial.polyval(s, c), coeffs, inplace=True)
+
+    def sum(self, *args):
+        return self._unary("sum", self._sum_shadow, *args)
+
+    def decrypt(self, *args):
+        return self.enc.decrypt(*args)
+
+    __add__ = __radd__ = add
+    __iadd__ = add_
+    __sub__ = sub
+    __isub__ = sub_
+    __mul__ = __rmul__ = mul
+    __imul__ = mul_
+    __matmul__ = matmul
+    __neg__ = neg
+    __pow__ = pow
+
+    def __rsub__(self, other):
+        operand, shadow_other = self._operand(other)
+        return self._apply("rsub", operand - self.enc, lambda s, o: o - s, shadow_other)
+
+
+if __name__ == "__main__":
+    import time
+
+    from tenseal_config import CONFIG_LR, CONFIG_VOTING, create_context
+
+    print(">>> [模块] 噪声/精度预算追踪演示")
+
+    # ==========================================================================
+    # A. 方差计算 (与 ckks_statistics_demo.py 相同) 放在 CONFIG_LR 上是否安全?
+    # ==========================================================================
+    print("\n--- A. CKKS 方差: 逐操作预算报告 ---")
+    ctx = create_context(CONFIG_LR)
+    dataset = [1.0, 2.0, 3.0, 4.0, 5.0]
+    n = len(dataset)
+
+    print("1. 原写法: Var = mean((x - mean(x))^2)")
+    tracker = NoiseTracker(CONFIG_LR, measure_error=True)
+    x = track(ts.ckks_vector(ctx, dataset), dataset, tracker)
+    try:
+        mu = x.sum() * (1 / n)
+        variance = (x - mu).square().sum() * (1 / n)
+        print(f"加密方差: {variance.decrypt()[0]:.6f}")
+    except ValueError as e:
+        print(f"❌ 深度耗尽: {e}")
+    print(tracker.report())
+    print("💡 观察: 与单元素向量相减 (x - mu) 的广播本身消耗 1 层深度，这正是 statistics demo 需要 4 层的原因。")
+
+    print("\n2. 改写: Var = mean(x^2) - mean(x)^2")
+    tracker = NoiseTracker(CONFIG_LR, measure_error=True)
+    x = track(ts.ckks_vector(ctx, dataset), dataset, tracker)
+    mu = x.sum() * (1 / n)
+    variance = x.square().sum() * (1 / n) - mu.square()
+    print(tracker.report())
+    print(f"汇总: {tracker.summary()}")
+    print(f"加密方差: {variance.decrypt()[0]:.6f} | 影子方差: {variance.shadow[0]:.6f}")
+
+    # ==========================================================================
+    # B. BFV 回绕检测
+    # ==========================================================================
+    print("\n--- B. BFV: 影子计算按 plain_modulus 回绕 ---")
+    bfv_ctx = create_context(CONFIG_VOTING, galois_keys=False)
+    bfv_tracker = NoiseTracker(CONFIG_VOTING, measure_error=True)
+    votes = [600000, 2, 3]
+    v = track(ts.bfv_vector(bfv_ctx, votes), votes, bfv_tracker)
+    doubled = v * 2
+    print(bfv_tracker.report())
+    print(f"解密: {doubled.decrypt()} | 影子: {doubled.shadow.astype(np.int64).tolist()} (600000*2 已回绕)")
+
+    # ==========================================================================
+    # C. 关闭时的开销
+    # ==========================================================================
+    print("\n--- C. 开销对比 ---")
+    data = np.random.uniform(-1, 1, 4096).tolist()
+    raw = ts.ckks_vector(ctx, data)
+
+    # 注意: 避免让 raw 作为与低层密文相加的操作数，auto_mod_switch 会原地降低它的层级
+    def pipeline(v):
+        return (v.square() * 0.5).sum()
+
+    for label, t in [("关闭 (None)", None), ("仅记录层级", NoiseTracker(CONFIG_LR, shadow=False)),
+                     ("影子计算", NoiseTracker(CONFIG_LR)), ("逐步解密", NoiseTracker(CONFIG_LR, measure_error=True))]:
+        v = track(raw, data, t)
+        start = time.perf_counter()
+        for _ in range(20):
+            pipeline(v)
+        print(f"{label}: {(time.perf_counter() - start) / 20 * 1000:.2f} ms/次 "
+              f"(包装对象: {type(v).__name__})")
+
+    # ==========================================================================
+    # D. 张量求和: 影子与 TenSEAL 默认 axis=0 一致
+    # ==========================================================================
+    print("\n--- D. CKKSTensor.sum(): 追踪 vs 未追踪 ---")
+    matrix = [[1.0, 2.0, 3.0], [2.0, 3.0, 4.0]]
+    tensor_tracker = NoiseTracker(CONFIG_LR, measure_error=True)
+    plain_sum = ts.ckks_tensor(ctx, matrix).sum().decrypt().tolist()
+    tracked_sum = track(ts.ckks_tensor(ctx, matrix), matrix, tensor_tracker).sum()
+    print(f"未追踪: {np.round(plain_sum, 4).tolist()} | 追踪: {np.round(tracked_sum.decrypt().tolist(), 4).tolist()} "
+          f"| 影子: {tracked_sum.shadow.tolist()}")
+    ok = np.allclose(tracked_sum.shadow, plain_sum, atol=1e-3) and tensor_tracker.summary()["min_precision_bits"] > 10
+    print(f"{'✅' if ok else '❌'} 最差精度 {tensor_tracker.summary()['min_precision_bits']:.1f} bits")
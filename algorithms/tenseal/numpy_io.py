@@ -0,0 +1,187 @@
+"""
+NumPy 直通的加密/解密入口 (NumPy I/O)
+---------------------------------------------------------
+演示与算法模块的数据都是 ndarray，而 TenSEAL 的接口以 list 为中心:
+加密前要 tolist()，解密张量得到嵌套 list 后再 np.array 一次，调用方还要自己记住
+float 对应 CKKS、int 对应 BFV。本模块统一这些转换:
+    加密:   方案由 Context 决定 (CKKS -> float64，BFV -> int64)，输入先转为对应 dtype 的连续数组
+    明文:   plain_tensor(ndarray) 用作 mul / add / matmul 的明文操作数
+    解密:   结果直接写入调用方提供的 out 缓冲区 (张量不经过嵌套 list)
+批量数据形状为 (n, slots)，每行一个向量密文。
+
+只使用 TenSEAL 的公开 API。曾尝试绕过 Python 封装直接调用 _ts_cpp 构造函数，
+实测加速仅 1.0–1.25x (解密甚至更慢)，不值得依赖私有接口，已移除。
+本模块的价值在于接口与正确的 dtype / 方案匹配，而不是速度: 底部的基准用于确认没有额外开销。
+
+使用方法:
+    enc = encrypt_vector(ctx, x)                      # x: np.ndarray，方案由 ctx 决定
+    encs = encrypt_batch(ctx, X)                      # X: (n, slots)
+    out = np.empty((n, slots)); decrypt_batch(encs, out)
+"""
+
+import time
+
+import numpy as np
+
+from tenseal_backend import ts
+from tenseal_config import SCHEME_BFV, context_scheme
+
+
+def as_buffer(data, dtype=None):
+    """转为 C 连续的 float64 / int64 数组；已满足要求时不复制。"""
+    arr = np.asarray(data)
+    if dtype is None:
+        dtype = np.int64 if arr.dtype.kind in "iub" else np.float64
+    return np.ascontiguousarray(arr, dtype=dtype)
+
+
+def _scheme_buffer(ctx, data):
+    """按 Context 的方案转换输入: CKKS -> float64；BFV -> int64 (拒绝非整数值，避免静默截断)。"""
+    if context_scheme(ctx) != SCHEME_BFV:
+        return as_buffer(data, np.float64), False
+    arr = np.asarray(data)
+    if arr.dtype.kind == "f" and not np.array_equal(arr, np.round(arr)):
+        raise ValueError("BFV 只能加密整数，输入中含有小数")
+    return as_buffer(arr, np.int64), True
+
+
+# ==============================================================================
+# 加密 (Encrypt)
+# ==============================================================================
+
+def encrypt_vector(ctx, data, scale=None):
+    """一维 ndarray -> CKKSVector / BFVVector (由 ctx 的方案决定)。"""
+    arr, is_bfv = _scheme_buffer(ctx, data)
+    if arr.ndim != 1:
+        raise ValueError("can only encrypt a vector")
+    if is_bfv:
+        return ts.bfv_vector(ctx, arr)
+    return ts.ckks_vector(ctx, arr, scale)
+
+
+def encrypt_batch(ctx, matrix, scale=None):
+    """(n, slots) ndarray -> n 个向量密文 (每行一个)。"""
+    arr, _ = _scheme_buffer(ctx, matrix)
+    if arr.ndim != 2:
+        raise ValueError("batch must be shaped (n, slots)")
+    return [encrypt_vector(ctx, row, scale) for row in arr]
+
+
+def plain_tensor(data, dtype=None):
+    """ndarray -> ts.PlainTensor；dtype 为 "float" / "int"，默认按数组 dtype 推断。"""
+    arr = as_buffer(data, None if dtype is None else (np.int64 if dtype == "int" else np.float64))
+    return ts.plain_tensor(arr, dtype="int" if arr.dtype == np.int64 else "float")
+
+
+def encrypt_tensor(ctx, data, scale=None, batch=False):
+    """任意形状 ndarray -> CKKSTensor / BFVTensor (由 ctx 的方案决定)。"""
+    arr, is_bfv = _scheme_buffer(ctx, data)
+    if is_bfv:
+        return ts.bfv_tensor(ctx, plain_tensor(arr), batch=batch)
+    return ts.ckks_tensor(ctx, plain_tensor(arr), scale, batch=batch)
+
+
+# ==============================================================================
+# 解密 (Decrypt)
+# ==============================================================================
+
+def _out_dtype(enc):
+    return np.int64 if isinstance(enc, (ts.BFVVector, ts.BFVTensor)) else np.float64
+
+
+def decrypt_vector(vec, out=None):
+    """解密到 out (一维，长度 >= size)；返回写入部分的视图。"""
+    values = vec.decrypt()
+    if out is None:
+        out = np.empty(len(values), dtype=_out_dtype(vec))
+    elif out.shape[0] < len(values):
+        raise ValueError(f"输出缓冲区长度 {out.shape[0]} 小于结果长度 {len(values)}")
+    view = out[:len(values)]
+    view[:] = values
+    return view
+
+
+def decrypt_batch(vectors, out=None):
+    """解密一批向量到 (n, width) 缓冲区的对应行；较短的行只写入前 size 个元素。"""
+    if out is None:
+        width = max(vec.size() for vec in vectors)
+        out = np.zeros((len(vectors), width), dtype=_out_dtype(vectors[0]))
+    elif out.shape[0] < len(vectors):
+        raise ValueError(f"输出缓冲区行数 {out.shape[0]} 小于向量个数 {len(vectors)}")
+    for i, vec in enumerate(vectors):
+        values = vec.decrypt()
+        if len(values) > out.shape[1]:
+            raise ValueError(f"第 {i} 个结果长度 {len(values)} 超过输出宽度 {out.shape[1]}")
+        out[i, :len(values)] = values
+    return out
+
+
+def decrypt_tensor(tensor, out=None):
+    """解密张量到 out (形状与张量相同)，不经过嵌套列表。"""
+    plain = tensor.decrypt()
+    raw = plain.data if isinstance(plain.data, np.ndarray) else plain.raw
+    shape = tuple(plain.shape)
+    if out is None:
+        out = np.empty(shape, dtype=_out_dtype(tensor))
+    elif tuple(out.shape) != shape:
+        raise ValueError(f"输出缓冲区形状 {out.shape} 与张量形状 {shape} 不一致")
+    out.reshape(-1)[:] = np.ravel(raw) if isinstance(raw, np.ndarray) else raw
+    return out
+
+
+if __name__ == "__main__":
+    from tenseal_config import CONFIG_LR, CONFIG_VOTING, create_context
+
+    print(">>> [模块] NumPy 加密/解密入口 vs 列表路径")
+
+    # --- 方案由 Context 决定，而不是输入的 dtype ---
+    bfv_ctx = create_context(CONFIG_VOTING, galois_keys=False, relin_keys=False)
+    ckks_ctx = create_context(CONFIG_LR, galois_keys=False)
+    print(f"CKKS Context + int 数组:   {np.round(decrypt_vector(encrypt_vector(ckks_ctx, np.arange(4))), 4)}")
+    print(f"BFV Context + float 数组:  {decrypt_vector(encrypt_vector(bfv_ctx, np.array([1.0, 2.0, 3.0])))}")
+
+    ctx = create_context(CONFIG_LR, galois_keys=False)
+    slots = CONFIG_LR["poly_modulus_degree"] // 2
+    rng = np.random.default_rng(0)
+
+    def bench(fn, repeat):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat
+
+    x = rng.uniform(-1, 1, slots)
+    batch = rng.uniform(-1, 1, (32, slots))
+    weight = rng.uniform(-1, 1, slots)
+    image = rng.uniform(0, 1, (8, 8))
+    enc_x = encrypt_vector(ctx, x)
+    enc_batch = encrypt_batch(ctx, batch)
+    enc_image = encrypt_tensor(ctx, image)
+    out_vec, out_batch, out_image = np.empty(slots), np.empty((32, slots)), np.empty((8, 8))
+
+    # (名称, 列表路径, NumPy 路径, 重复次数)
+    cases = [
+        ("encrypt (满槽位)", lambda: ts.ckks_vector(ctx, x.tolist()), lambda: encrypt_vector(ctx, x), 20),
+        ("decrypt (满槽位)", lambda: np.array(enc_x.decrypt()), lambda: decrypt_vector(enc_x, out_vec), 20),
+        ("mul_plain (满槽位)", lambda: enc_x * weight.tolist(), lambda: enc_x * plain_tensor(weight), 20),
+        ("add_plain (满槽位)", lambda: enc_x + weight.tolist(), lambda: enc_x + plain_tensor(weight), 20),
+        ("encrypt_batch (32, slots)", lambda: [ts.ckks_vector(ctx, row) for row in batch.tolist()],
+         lambda: encrypt_batch(ctx, batch), 3),
+        ("decrypt_batch (32, slots)", lambda: np.array([v.decrypt() for v in enc_batch]),
+         lambda: decrypt_batch(enc_batch, out_batch), 3),
+        ("tensor encrypt (8x8)", lambda: ts.ckks_tensor(ctx, image.tolist()), lambda: encrypt_tensor(ctx, image), 2),
+        ("tensor decrypt (8x8)", lambda: np.array(enc_image.decrypt().tolist()),
+         lambda: decrypt_tensor(enc_image, out_image), 2),
+    ]
+
+    print(f"\n{'操作':<26} | {'列表(ms)':<9} | {'NumPy(ms)':<9} | 比值")
+    print("-" * 60)
+    for name, list_fn, np_fn, repeat in cases:
+        t_list, t_np = bench(list_fn, repeat), bench(np_fn, repeat)
+        print(f"{name:<26} | {t_list * 1000:<9.2f} | {t_np * 1000:<9.2f} | {t_list / t_np:.2f}x")
+
+    err = max(np.max(np.abs(decrypt_vector(enc_x) - x)),
+              np.max(np.abs(decrypt_batch(enc_batch) - batch)),
+              np.max(np.abs(decrypt_tensor(enc_image) - image)))
+    print(f"\n正确性: 最大误差 {err:.1e}")
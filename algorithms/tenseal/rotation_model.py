@@ -0,0 +1,46 @@
+"""
+旋转次数模型 (Rotation Count Model)
+---------------------------------------------------------
+按 TenSEAL C++ 实现估算 CKKSVector / BFVVector 各操作需要的旋转 (Galois 密钥切换) 次数。
+纯整数计算，不导入 TenSEAL，模拟后端 (TENSEAL_BACKEND=mock) 下也不会加载原生扩展。
+tenseal_profiler.py 用它把旋转归属到高层调用，rotation_sharing.py 用它做代价估算。
+
+使用方法:
+    from rotation_model import sum_rotations, matmul_rotations
+    sum_rotations(4096)     # 12
+    matmul_rotations(64)    # 63
+"""
+
+import math
+
+
+def sum_rotations(size):
+    """
+    sum_vector(size) 的旋转次数:
+    对 size 以下最大的 2 的幂做 log2 次折叠，余下部分先旋转 1 次再递归。
+    """
+    if size <= 1:
+        return 0
+    bp2 = 1 << (size.bit_length() - 1)
+    rotations = bp2.bit_length() - 1
+    if bp2 != size:
+        rotations += 1 + sum_rotations(size - bp2)
+    return rotations
+
+
+def matmul_rotations(n_rows):
+    """对角线法 vector x matrix: 每条非零对角线 (除第 0 条) 旋转 1 次，按稠密矩阵估算。"""
+    return max(n_rows - 1, 0)
+
+
+def broadcast_rotations(size):
+    """单元素向量与长度为 size 的向量运算时，replicate_first_slot 需要 ceil(log2(size)) 次旋转 (外加 1 层深度)。"""
+    return math.ceil(math.log2(size)) if size > 1 else 0
+
+
+if __name__ == "__main__":
+    print(">>> [模块] 旋转次数模型")
+    print(f"{'长度':<6} | {'sum/dot':<8} | {'matmul':<7} | {'广播':<4}")
+    print("-" * 36)
+    for n in (2, 3, 16, 100, 256, 4096):
+        print(f"{n:<6} | {sum_rotations(n):<8} | {matmul_rotations(n):<7} | {broadcast_rotations(n):<4}")
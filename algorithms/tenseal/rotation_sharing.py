@@ -0,0 +1,265 @@
+"""
+旋转共享的归约 / 点积 / 矩阵乘 (Rotation Sharing)
+---------------------------------------------------------
+sum() / dot() 每次要做 log2(n) 次旋转，对角线法 matmul 要做 n - 1 次旋转；
+每次旋转都是一次完整的 key switching (CONFIG_LR 上约 5ms，加法只要 0.15ms)。
+
+tenseal.sealapi.Evaluator 暴露了 rotate_vector / apply_galois 等单次旋转，
+但 SEAL 的公开 API 没有 hoisted 多次旋转 (密文分解一次、复用于多个 Galois 元素)，
+逐个调用 rotate_vector 的代价与 sum() 内部的旋转相同；真正的 hoisting 需要修改 SEAL/C++ 实现。
+本模块在现有接口内用等价思路减少 key switching 次数:
+    1. 共享旋转树 (SharedReduction): 利用线性 Σ sum(v_i) = sum(Σ v_i)，
+       多个归约项先逐槽相加，最后只做一次旋转树 —— 把旋转从循环中“提升”出去。
+    2. 延迟归约 (mode="client"): 服务端返回未求和的向量，私钥持有方解密后用 NumPy 求和。
+       解密一个“标量”结果和解密整个向量的密文大小相同，旋转次数降为 0；
+       代价是客户端看到未求和的逐槽乘积项 (前提见 ckks_refresh.py 的安全说明)。
+    3. 列打包矩阵乘 (matmul_columns): 样本沿槽位打包、每个特征一个密文时，
+       x·W 只需 n×m 次标量乘与加法，没有旋转，并且一次处理 slots 个样本。
+plan_matmul 根据实测的单次旋转 / 标量乘 / 加法耗时选择对角线法或列打包。
+
+使用方法:
+    acc = SharedReduction(mode="client")
+    for a, b in pairs:
+        acc.add_product(a, b)
+    total = finish(acc.result().decrypt())
+"""
+
+import math
+import time
+
+import numpy as np
+
+from rotation_model import matmul_rotations, sum_rotations
+from tenseal_backend import ts
+
+MODES = ("server", "client")
+
+
+def finish(values):
+    """私钥持有方: 对解密结果求和；server 模式下结果只有 1 个元素，client 模式下为整个向量。"""
+    return float(np.sum(values))
+
+
+class SharedReduction:
+    """
+    逐槽累加多个归约项，result() 时只做一次旋转树 (server) 或不做 (client)。
+    所有项的长度必须相同。调用方传入的密文不会被修改:
+    第一项只保存引用，第二项起累加到本对象自己创建的密文上 (add_ 只作用于它)。
+    """
+
+    def __init__(self, mode="server"):
+        if mode not in MODES:
+            raise ValueError(f"mode 必须是 {MODES} 之一")
+        self.mode = mode
+        self.acc = None
+        self.terms = 0
+        self._owned = False
+
+    def add(self, term):
+        return self._accumulate(term, owned=False)
+
+    def add_product(self, a, b):
+        """累加一个点积项 a · b (b 可以是密文或明文)。乘积是新密文，可直接作为累加器。"""
+        return self._accumulate(a * b, owned=True)
+
+    def _accumulate(self, term, owned):
+        if self.acc is None:
+            self.acc, self._owned = term, owned
+        elif self._owned:
+            self.acc.add_(term)
+        else:
+            self.acc, self._owned = self.acc + term, True
+        self.terms += 1
+        return self
+
+    def result(self):
+        if self.acc is None:
+            raise ValueError("没有任何归约项")
+        return self.acc.sum() if self.mode == "server" else self.acc
+
+    def rotations_saved(self):
+        """相对逐项 sum() 节省的旋转次数。"""
+        per_tree = sum_rotations(self.acc.size()) if self.acc is not None else 0
+        used = per_tree if self.mode == "server" else 0
+        return self.terms * per_tree - used
+
+
+def shared_sum(vectors, mode="server"):
+    """Σ_i sum(v_i)，只用一次旋转树。"""
+    acc = SharedReduction(mode)
+    for vec in vectors:
+        acc.add(vec)
+    return acc.result()
+
+
+def shared_dot(pairs, mode="server"):
+    """Σ_i dot(a_i, b_i)，只用一次旋转树。"""
+    acc = SharedReduction(mode)
+    for a, b in pairs:
+        acc.add_product(a, b)
+    return acc.result()
+
+
+# ==============================================================================
+# 矩阵乘 (Matmul)
+# ==============================================================================
+
+def matmul_columns(columns, weight):
+    """
+    列打包矩阵乘: columns[i] 是第 i 个特征在所有样本上的密文 (样本沿槽位打包)，
+    返回 m 个密文，第 j 个为所有样本的 (x · W)[:, j]。只用标量乘与加法，没有旋转。
+    """
+    weight = np.asarray(weight, dtype=np.float64)
+    if weight.shape[0] != len(columns):
+        raise ValueError("matrix shape doesn't match with vector size")
+    outputs = []
+    for j in range(weight.shape[1]):
+        out = columns[0] * float(weight[0, j])
+        for col, w in zip(columns[1:], weight[1:, j]):
+            out.add_(col * float(w))
+        outputs.append(out)
+    return outputs
+
+
+def measure_costs(ctx, size=None, repeat=3, seed=0):
+    """
+    在 ctx 上实测单次旋转、标量乘、加法的耗时 (秒)。
+    旋转耗时由不同长度 sum() 的耗时对旋转次数做线性拟合得到 (斜率)；
+    对角线法每条对角线还要编码并乘一个明文，单独用一次 16 x 16 的 matmul 标定。
+    """
+    rng = np.random.default_rng(seed)
+
+    def timed(fn):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat
+
+    sizes = [2, 16, 256, size or 4096]
+    rotations, seconds = [], []
+    for n in sizes:
+        vec = ts.ckks_vector(ctx, rng.uniform(-1, 1, n).tolist())
+        rotations.append(sum_rotations(n))
+        seconds.append(timed(vec.sum))
+    slope, intercept = np.polyfit(rotations, seconds, 1)
+
+    a = ts.ckks_vector(ctx, rng.uniform(-1, 1, sizes[-1]).tolist())
+    b = ts.ckks_vector(ctx, rng.uniform(-1, 1, sizes[-1]).tolist())
+    small = ts.ckks_vector(ctx, rng.uniform(-1, 1, 16).tolist())
+    weight = rng.uniform(-1, 1, (16, 16)).tolist()
+    return {
+        "rotation": max(float(slope), 0.0),
+        "diagonal": timed(lambda: small.matmul(weight)) / matmul_rotations(16),
+        "sum_overhead": max(float(intercept), 0.0),
+        "scalar_mul": timed(lambda: a * 0.5),
+        "add": timed(lambda: a + b),
+        "sum_samples": list(zip(rotations, seconds)),
+    }
+
+
+def plan_matmul(n_in, n_out, n_samples, slots, costs):
+    """
+    估算 n_samples 个样本做 (n_in x n_out) 矩阵乘的耗时，返回 (方案, {方案: 秒})。
+        diagonal: 每个样本一个密文，TenSEAL 对角线法，每条对角线一次旋转 + 一次明文乘
+        columns:  样本沿槽位打包，每组 slots 个样本做 n_in × n_out 次标量乘与加法
+    """
+    diagonal = n_samples * max(matmul_rotations(n_in), 1) * costs["diagonal"]
+    groups = math.ceil(n_samples / slots)
+    columns = groups * n_in * n_out * (costs["scalar_mul"] + costs["add"])
+    estimates = {"diagonal": diagonal, "columns": columns}
+    return min(estimates, key=estimates.get), estimates
+
+
+if __name__ == "__main__":
+    from ckks_logistic_regression import EncryptedLogisticRegression
+    from tenseal_config import CONFIG_LR, context_slots, create_context
+
+    print(">>> [模块] 旋转共享: 归约 / 点积 / 矩阵乘")
+    ctx = create_context(CONFIG_LR)
+    slots = context_slots(ctx)
+    rng = np.random.default_rng(0)
+
+    def timed(fn, repeat=1):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            out = fn()
+        return out, (time.perf_counter() - start) / repeat
+
+    # ==========================================================================
+    # A. 旋转耗时 vs 旋转次数
+    # ==========================================================================
+    print("\n--- A. 旋转耗时 vs 旋转次数 (CONFIG_LR) ---")
+    costs = measure_costs(ctx)
+    print(f"{'操作':<14} | {'旋转次数':<6} | {'耗时(ms)':<8}")
+    print("-" * 36)
+    for (rot, sec), n in zip(costs["sum_samples"], [2, 16, 256, 4096]):
+        print(f"{f'sum({n})':<14} | {rot:<6} | {sec * 1000:<8.2f}")
+    for n in (4, 16, 64):
+        vec = ts.ckks_vector(ctx, rng.uniform(-1, 1, n).tolist())
+        weight = rng.uniform(-1, 1, (n, 4)).tolist()
+        _, sec = timed(lambda: vec.matmul(weight))
+        print(f"{f'matmul({n}x4)':<14} | {matmul_rotations(n):<6} | {sec * 1000:<8.2f}")
+    print(f"拟合: 单次旋转 ≈ {costs['rotation'] * 1000:.2f}ms | 对角线 ≈ {costs['diagonal'] * 1000:.2f}ms "
+          f"| 标量乘 ≈ {costs['scalar_mul'] * 1000:.2f}ms | 加法 ≈ {costs['add'] * 1000:.2f}ms")
+
+    # ==========================================================================
+    # B. k 个归约: 逐项 sum vs 共享旋转树 vs 延迟归约
+    # ==========================================================================
+    print("\n--- B. k 个点积之和 (每个长度 4096) ---")
+    print(f"{'k':<4} | {'逐项(ms)':<9} | {'共享(ms)':<9} | {'延迟(ms)':<9} | 最大误差")
+    print("-" * 56)
+    for k in (1, 4, 16):
+        xs = [rng.uniform(-1, 1, slots) for _ in range(k)]
+        ws = [rng.uniform(-1, 1, slots) for _ in range(k)]
+        enc = [ts.ckks_vector(ctx, x.tolist()) for x in xs]
+        expected = sum(x.dot(w) for x, w in zip(xs, ws))
+
+        def naive():
+            total = enc[0].dot(ws[0].tolist())
+            for e, w in zip(enc[1:], ws[1:]):
+                total.add_(e.dot(w.tolist()))
+            return total
+
+        results = []
+        for fn in (naive,
+                   lambda: shared_dot(zip(enc, (w.tolist() for w in ws)), "server"),
+                   lambda: shared_dot(zip(enc, (w.tolist() for w in ws)), "client")):
+            out, sec = timed(fn)
+            results.append((sec, abs(finish(out.decrypt()) - expected)))
+        print(f"{k:<4} | {results[0][0] * 1000:<9.1f} | {results[1][0] * 1000:<9.1f} | "
+              f"{results[2][0] * 1000:<9.1f} | {max(r[1] for r in results):.1e}")
+
+    # ==========================================================================
+    # C. 逻辑回归加密梯度: 服务端归约 vs 延迟归约
+    # ==========================================================================
+    print("\n--- C. 逻辑回归加密梯度 (1 个 batch) ---")
+    n_features, n_samples = 6, 1024
+    X = rng.normal(0, 1, (n_samples, n_features))
+    y = (X.sum(axis=1) > 0).astype(np.float64)
+    for mode in MODES:
+        model = EncryptedLogisticRegression(n_features, context=ctx, reduce=mode)
+        batch = model.encrypt_batch(X, y)
+        model._batch_cache(batch)
+        enc_theta = model._encrypt_theta(batch.n_samples)
+        grads, sec = timed(lambda: model.encrypted_gradient(batch, enc_theta))
+        _, dec_sec = timed(lambda: [finish(g.decrypt()) for g in grads])
+        print(f"reduce={mode:<7} 服务端 {sec * 1000:7.1f}ms | 客户端解密+求和 {dec_sec * 1000:6.1f}ms")
+
+    # ==========================================================================
+    # D. 矩阵乘: 对角线法 vs 列打包
+    # ==========================================================================
+    print("\n--- D. 64 -> 16 矩阵乘, 256 个样本 ---")
+    n_in, n_out, n_samples = 64, 16, 256
+    X = rng.uniform(-1, 1, (n_samples, n_in))
+    W = rng.uniform(-0.5, 0.5, (n_in, n_out))
+    plan, estimates = plan_matmul(n_in, n_out, n_samples, slots, costs)
+    print("代价模型: " + ", ".join(f"{k} ≈ {v:.2f}s" for k, v in estimates.items()) + f" -> 选择 {plan}")
+
+    sample = ts.ckks_vector(ctx, X[0].tolist())
+    _, per_sample = timed(lambda: sample.matmul(W.tolist()))
+    columns = [ts.ckks_vector(ctx, X[:, i].tolist()) for i in range(n_in)]
+    outputs, col_sec = timed(lambda: matmul_columns(columns, W))
+    err = np.max(np.abs(np.array([o.decrypt() for o in outputs]).T - X.dot(W)))
+    print(f"对角线法: {per_sample * n_samples:.2f}s (单样本 {per_sample * 1000:.0f}ms × {n_samples}) | "
+          f"列打包: {col_sec:.2f}s | 加速 {per_sample * n_samples / col_sec:.1f}x | 最大误差 {err:.1e}")
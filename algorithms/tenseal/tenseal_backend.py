@@ -0,0 +1,67 @@
+"""
+TenSEAL 后端选择 (Backend Selection)
+---------------------------------------------------------
+所有演示与算法模块统一通过本模块获取 ts，而不是直接 import tenseal:
+    from tenseal_backend import ts
+
+环境变量 TENSEAL_BACKEND:
+    tenseal (默认)  真实同态加密
+    mock            NumPy 明文模拟 (mock_tenseal.py)，跟踪深度/槽位/BFV 回绕，用于快速测试业务逻辑
+
+使用方法:
+    TENSEAL_BACKEND=mock python ckks_logistic_regression.py
+    TENSEAL_BACKEND=mock TENSEAL_MOCK_NOISE=1e-6 python ckks_statistics_demo.py
+
+延迟导入: ts 是一个代理，首次访问属性 (ts.context / ts.SCHEME_TYPE ...) 时才导入后端模块。
+import tenseal 连带导入 numpy 约 0.1 s，只读配置或只做调度/通信的进程 (如预热进程的客户端) 不必付出这笔开销。
+加载后每次属性访问都转发到模块本身 (不复制属性)，
+因此 tenseal_profiler 等对模块函数的运行时替换对 ts.xxx 同样生效。
+"""
+
+import importlib
+import os
+
+BACKENDS = ("tenseal", "mock")
+BACKEND = os.environ.get("TENSEAL_BACKEND", "tenseal").strip().lower()
+
+_MODULES = {"tenseal": "tenseal", "mock": "mock_tenseal"}
+if BACKEND not in _MODULES:
+    raise ImportError(f"未知的 TENSEAL_BACKEND={BACKEND!r}，可选: {', '.join(BACKENDS)}")
+
+
+class _LazyModule:
+    """首次访问属性时才导入的模块代理。"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        # 代理自身只有 _name / _module，其余属性每次都转发，始终取模块的当前值
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "已加载" if self._module is not None else "未加载"
+        return f"<延迟导入模块 {self._name!r} ({state})>"
+
+
+ts = _LazyModule(_MODULES[BACKEND])
+
+
+def is_mock():
+    return BACKEND == "mock"
+
+
+def is_loaded():
+    """后端模块是否已被导入。"""
+    return ts._module is not None
+
+
+def load():
+    """立即导入后端模块并返回 (例如在 fork 工作进程之前预加载)。"""
+    return ts._load()
@@ -0,0 +1,337 @@
+"""
+TenSEAL 基准测试套件 (Benchmark Suite)
+---------------------------------------------------------
+对 tenseal_config 中的每个场景配置 (STATS / LR / DNN / VOTING)，覆盖演示脚本用到的全部操作:
+    encrypt / decrypt / add / mul / square / polyval / matmul / sum / dot /
+    tensor 操作 / serialize / deserialize / context 序列化与加载
+度量: 耗时 (多次重复取中位数)、密文与 Context 字节数、峰值 RSS。
+向量长度从小到满槽位 (full = poly_modulus_degree / 2)。
+
+每个配置在独立的 spawn 子进程中运行，使峰值 RSS 互不干扰。
+结果保存为 JSON；compare 子命令对比两次结果并标记回退 (用于升级 TenSEAL 前后):
+耗时、密文/Context 字节数与峰值 RSS 超过阈值都算回退。
+基准测试只针对真实 TenSEAL: TENSEAL_BACKEND=mock 时 run 直接报错 (导入本模块不修改环境变量，
+compare 不需要后端)。
+
+使用方法:
+    python tenseal_benchmark.py run --output base.json
+    python tenseal_benchmark.py run --configs LR DNN --sizes 16 256 full --repeat 5 --output new.json
+    python tenseal_benchmark.py compare base.json new.json --threshold 0.15
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import sys
+import time
+
+import numpy as np
+import tenseal as ts
+
+import tenseal_backend
+from tenseal_config import CONFIG_DNN, CONFIG_LR, CONFIG_STATS, CONFIG_VOTING, SCHEME_BFV, create_context, scheme_name
+
+CONFIGS = {
+    "STATS": CONFIG_STATS,
+    "LR": CONFIG_LR,
+    "DNN": CONFIG_DNN,
+    "VOTING": CONFIG_VOTING,
+}
+
+DEFAULT_SIZES = ["16", "256", "full"]
+
+# matmul 的旋转次数与输入长度成正比 (对角线法)，CKKSTensor 每个元素一个密文，
+# 超过这些上限时耗时以分钟计，默认跳过。
+MATMUL_MAX_SIZE = 256
+MATMUL_OUT_DIM = 16
+TENSOR_MAX_SIZE = 64
+
+# polyval 3 次多项式需要 2 层深度
+POLY_COEFFS = [0.5, 0.197, 0.0, -0.004]
+POLY_DEPTH = 2
+
+
+def require_real_backend():
+    """基准测试的数字只对真实 TenSEAL 有意义；模拟后端下拒绝运行而不是悄悄替换后端。"""
+    if tenseal_backend.is_mock():
+        raise RuntimeError("当前 TENSEAL_BACKEND=mock，基准测试需要真实 TenSEAL: "
+                           "请取消该环境变量或设为 TENSEAL_BACKEND=tenseal")
+
+
+def config_depth(config):
+    """CKKS 配置的乘法深度 (中间素数个数)；BFV 没有模数链，按 1 处理。"""
+    if scheme_name(config["scheme_type"]) == SCHEME_BFV:
+        return 1
+    return len(config["coeff_mod_bit_sizes"]) - 2
+
+
+def peak_rss_mb():
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _time(fn, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _resolve_sizes(sizes, slots):
+    out = []
+    for s in sizes:
+        n = slots if s == "full" else min(int(s), slots)
+        if n not in out:
+            out.append(n)
+    return out
+
+
+# ==============================================================================
+# 单个配置的基准 (在子进程中执行)
+# ==============================================================================
+
+def bench_config(name, sizes, repeat, seed=0):
+    require_real_backend()
+    config = CONFIGS[name]
+    is_bfv = scheme_name(config["scheme_type"]) == SCHEME_BFV
+    slots = config["poly_modulus_degree"] // 2
+    depth = config_depth(config)
+    rng = np.random.default_rng(seed)
+    results = []
+
+    def record(op, size, fn, nbytes=None):
+        durations = _time(fn, repeat)
+        results.append({
+            "config": name, "op": op, "size": size,
+            "seconds": statistics.median(durations), "min_seconds": min(durations),
+            "repeat": repeat, "bytes": nbytes,
+        })
+
+    # --- Context 创建 / 序列化 / 加载 ---
+    start = time.perf_counter()
+    ctx = create_context(config)
+    results.append({"config": name, "op": "context_create", "size": None,
+                    "seconds": time.perf_counter() - start, "min_seconds": None, "repeat": 1, "bytes": None})
+
+    public_bytes = ctx.serialize(save_secret_key=False)
+    secret_bytes = ctx.serialize(save_secret_key=True)
+    record("context_serialize", None, lambda: ctx.serialize(save_secret_key=False), len(public_bytes))
+    record("context_load", None, lambda: ts.context_from(public_bytes), len(public_bytes))
+
+    encrypt = ts.bfv_vector if is_bfv else ts.ckks_vector
+    vector_from = ts.bfv_vector_from if is_bfv else ts.ckks_vector_from
+    ciphertext_bytes = {}
+
+    for size in _resolve_sizes(sizes, slots):
+        if is_bfv:
+            a = rng.integers(0, 100, size).tolist()
+            b = rng.integers(0, 100, size).tolist()
+        else:
+            a = rng.uniform(-1, 1, size).tolist()
+            b = rng.uniform(-1, 1, size).tolist()
+
+        enc_a = encrypt(ctx, a)
+        enc_b = encrypt(ctx, b)
+        blob = enc_a.serialize()
+        ciphertext_bytes[size] = len(blob)
+
+        record("encrypt", size, lambda: encrypt(ctx, a))
+        record("decrypt", size, lambda: enc_a.decrypt())
+        record("add", size, lambda: enc_a + enc_b)
+        record("add_plain", size, lambda: enc_a + b)
+        record("mul", size, lambda: enc_a * enc_b)
+        record("mul_plain", size, lambda: enc_a * b)
+        record("sum", size, lambda: enc_a.sum())
+        record("dot", size, lambda: enc_a.dot(enc_b))
+        record("dot_plain", size, lambda: enc_a.dot(b))
+        record("serialize", size, lambda: enc_a.serialize(), len(blob))
+        record("deserialize", size, lambda: vector_from(ctx, blob), len(blob))
+
+        # BFVVector 没有 square / polyval / matmul
+        if not is_bfv:
+            record("square", size, lambda: enc_a.square())
+
+        if not is_bfv and depth >= POLY_DEPTH:
+            record("polyval", size, lambda: enc_a.polyval(POLY_COEFFS))
+
+        if not is_bfv and size <= MATMUL_MAX_SIZE:
+            weight = rng.uniform(-1, 1, (size, MATMUL_OUT_DIM)).tolist()
+            record("matmul", size, lambda: enc_a.matmul(weight))
+
+        if not is_bfv and size <= TENSOR_MAX_SIZE:
+            shape = [size // 8, 8] if size >= 8 and size % 8 == 0 else [size]
+            plain = np.array(a).reshape(shape).tolist()
+            enc_t = ts.ckks_tensor(ctx, plain)
+            record("tensor_encrypt", size, lambda: ts.ckks_tensor(ctx, plain))
+            record("tensor_add", size, lambda: enc_t + enc_t)
+            record("tensor_mul_plain", size, lambda: enc_t * plain)
+            record("tensor_sum", size, lambda: enc_t.sum())
+            record("tensor_decrypt", size, lambda: enc_t.decrypt())
+            record("tensor_serialize", size, lambda: enc_t.serialize(), len(enc_t.serialize()))
+
+    summary = {
+        "scheme": "BFV" if is_bfv else "CKKS",
+        "poly_modulus_degree": config["poly_modulus_degree"],
+        "depth": depth,
+        "slots": slots,
+        "context_bytes_public": len(public_bytes),
+        "context_bytes_secret": len(secret_bytes),
+        "ciphertext_bytes": ciphertext_bytes,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return results, summary
+
+
+def _bench_worker(args):
+    return bench_config(*args)
+
+
+def run(configs, sizes, repeat):
+    """每个配置一个 spawn 子进程 (峰值 RSS 独立统计)。"""
+    require_real_backend()
+    mp = multiprocessing.get_context("spawn")
+    report = {
+        "meta": {
+            "tenseal": getattr(ts, "__version__", "unknown"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "configs": {},
+        "results": [],
+    }
+    for name in configs:
+        print(f"⏱️ 正在测试 {name} ({CONFIGS[name]['name']}) ...")
+        with mp.Pool(1) as pool:
+            results, summary = pool.apply(_bench_worker, ((name, sizes, repeat),))
+        report["configs"][name] = summary
+        report["results"].extend(results)
+    return report
+
+
+# ==============================================================================
+# 报告与对比 (Report / Compare)
+# ==============================================================================
+
+def format_report(report):
+    lines = []
+    for name, s in report["configs"].items():
+        lines.append(f"\n[{name}] {s['scheme']} N={s['poly_modulus_degree']} 深度={s['depth']} "
+                     f"Context={s['context_bytes_public'] / 1e6:.2f}MB(公钥) / {s['context_bytes_secret'] / 1e6:.2f}MB(私钥) "
+                     f"峰值RSS={s['peak_rss_mb']:.0f}MB")
+        lines.append(f"{'Op':<18} | {'Size':<6} | {'Median(ms)':<11} | {'Bytes':<10}")
+        lines.append("-" * 54)
+        for r in report["results"]:
+            if r["config"] != name:
+                continue
+            size = "-" if r["size"] is None else r["size"]
+            nbytes = "-" if r["bytes"] is None else r["bytes"]
+            lines.append(f"{r['op']:<18} | {size:<6} | {r['seconds'] * 1000:<11.3f} | {nbytes:<10}")
+    return "\n".join(lines)
+
+
+def compare(base, new, threshold=0.15):
+    """
+    对齐两次结果，new/base 的比值超过 1 + threshold 记为回退。对比的指标 (metric):
+        time   每个 (config, op, size) 的中位耗时
+        bytes  同一项记录的字节数 (密文 / Context 序列化)，以及每个配置的 Context 与密文大小
+        rss    每个配置的峰值 RSS
+    返回 (行列表, 回退数)，行为 (config, op, size, metric, base, new, ratio, status)。
+    """
+    rows = []
+
+    def add(config, op, size, metric, old, cur):
+        if old and cur is not None:
+            rows.append([config, op, size, metric, old, cur, cur / old])
+
+    base_index = {(r["config"], r["op"], r["size"]): r for r in base["results"]}
+    for r in new["results"]:
+        old = base_index.get((r["config"], r["op"], r["size"]))
+        if old is None:
+            continue
+        add(r["config"], r["op"], r["size"], "time", old["seconds"], r["seconds"])
+        add(r["config"], r["op"], r["size"], "bytes", old.get("bytes"), r.get("bytes"))
+
+    for name, s in new["configs"].items():
+        old = base["configs"].get(name)
+        if old is None:
+            continue
+        add(name, "context_public", None, "bytes", old["context_bytes_public"], s["context_bytes_public"])
+        add(name, "context_secret", None, "bytes", old["context_bytes_secret"], s["context_bytes_secret"])
+        for size, nbytes in s["ciphertext_bytes"].items():
+            add(name, "ciphertext", size, "bytes", old["ciphertext_bytes"].get(size), nbytes)
+        add(name, "peak_rss", None, "rss", old["peak_rss_mb"], s["peak_rss_mb"])
+
+    regressions = 0
+    for row in rows:
+        ratio = row[-1]
+        if ratio > 1 + threshold:
+            status = "❌ REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status = "✅ faster" if row[3] == "time" else "✅ smaller"
+        else:
+            status = "ok"
+        row.append(status)
+    return [tuple(row) for row in rows], regressions
+
+
+def _format_metric(metric, value):
+    if metric == "time":
+        return f"{value * 1000:.3f}ms"
+    if metric == "rss":
+        return f"{value:.0f}MB"
+    return f"{value:.0f}B"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TenSEAL 场景配置基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="运行基准测试")
+    run_p.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    run_p.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="向量长度, 'full' 表示满槽位")
+    run_p.add_argument("--repeat", type=int, default=3)
+    run_p.add_argument("--output", help="结果 JSON 路径")
+
+    cmp_p = sub.add_parser("compare", help="对比两次结果并标记回退")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=0.15, help="允许的相对变慢比例")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args.configs, args.sizes, args.repeat)
+        print(format_report(report))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"\n📦 结果已保存: {args.output}")
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows, regressions = compare(base, new, args.threshold)
+    print(f"{'Config':<7} | {'Op':<18} | {'Size':<6} | {'Metric':<6} | {'Base':<12} | {'New':<12} | "
+          f"{'Ratio':<6} | Status")
+    print("-" * 98)
+    for cfg, op, size, metric, old, cur, ratio, status in rows:
+        size = "-" if size is None else size
+        print(f"{cfg:<7} | {op:<18} | {size:<6} | {metric:<6} | {_format_metric(metric, old):<12} | "
+              f"{_format_metric(metric, cur):<12} | {ratio:<6.2f} | {status}")
+    print(f"\n共 {len(rows)} 项，回退 {regressions} 项 (阈值 {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
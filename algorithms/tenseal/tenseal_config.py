@@ -7,17 +7,26 @@ TenSEAL Expert Configuration File
 使用方法:
     from tenseal_config import create_context, CONFIG_LR
     ctx = create_context(CONFIG_LR)
+
+导入本模块不会加载 TenSEAL 原生库: ts 为延迟导入代理，方案常量是名称字符串，
+只有 create_context / resolve_scheme 被调用时才真正导入。
+
+⚠️ 接口变更: SCHEME_CKKS / SCHEME_BFV 以及配置中的 "scheme_type" 以前是 ts.SCHEME_TYPE 成员，
+现在是字符串 "CKKS" / "BFV"。直接调用 ts.context 的代码需改为
+    ts.context(resolve_scheme(SCHEME_CKKS), ...)
+判断配置方案时先用 scheme_name() 归一化再与 SCHEME_CKKS / SCHEME_BFV 比较，
+这样仍写着 ts.SCHEME_TYPE 成员的旧配置也能正确识别 (已创建的 Context 用 context_scheme(ctx))。
 """
 
-import tenseal as ts
+from tenseal_backend import ts
 
 # ==============================================================================
 # 1. 基础常量定义 (Fundamental Constants)
 # ==============================================================================
 
-# 同态加密方案选择
-SCHEME_CKKS = ts.SCHEME_TYPE.CKKS  # 浮点数近似计算 (ML/数据分析首选)
-SCHEME_BFV = ts.SCHEME_TYPE.BFV    # 整数精确计算 (投票/ID匹配)
+# 同态加密方案选择 (ts.SCHEME_TYPE 的成员名，由 resolve_scheme 解析)
+SCHEME_CKKS = "CKKS"  # 浮点数近似计算 (ML/数据分析首选)
+SCHEME_BFV = "BFV"    # 整数精确计算 (投票/ID匹配)
 
 # 多项式模数度 (N)
 # 决定了容器大小(Slots)和安全性上限
@@ -38,11 +47,13 @@ SCALE_STD = 2 ** 40
 # 场景 A: 简单统计 (Simple Statistics)
 # ------------------------------------------------------------------
 # 适用: 求和、平均值、方差、简单线性加权。
-# 特点: 速度极快，密文体积小，仅支持 1 次乘法深度。
+# 特点: 模数链最短，运算最快，仅支持 1 次乘法深度。
+# 注意: 4096 的模数链上限仅 109 bits，放不下 [60, 40, 60]；能放下的 [40, 20, 40]
+#      只能配 2^20 的 Scale，平方误差约 1%，不适合统计。因此这里使用 8192。
 CONFIG_STATS = {
     "name": "Simple Statistics (Speed Optimized)",
     "scheme_type": SCHEME_CKKS,
-    "poly_modulus_degree": DEGREE_FAST,  # 4096
+    "poly_modulus_degree": DEGREE_STD,   # 8192
     # 模数链: [顶层60, 中间40(1次乘法), 底层60] -> 总和 160 bits
     "coeff_mod_bit_sizes": [60, 40, 60],
     "global_scale": SCALE_STD,
@@ -58,10 +69,11 @@ CONFIG_LR = {
     "name": "Machine Learning (Standard)",
     "scheme_type": SCHEME_CKKS,
     "poly_modulus_degree": DEGREE_STD,   # 8192
-    # 模数链: [顶层60, 中间40*3(3次乘法), 底层60] -> 总和 240 bits
-    # 注意: 240 bits 略微超过 8192 的默认安全线(218)，但 TenSEAL 允许一定浮动。
-    # 如果追求绝对安全，可减少一个 40，变为 [60, 40, 40, 60] (深度2)
-    "coeff_mod_bit_sizes": [60, 40, 40, 40, 60], 
+    # 模数链: [顶层50, 中间40*3(3次乘法), 特殊素数48] -> 总和 218 bits
+    # 注意: SEAL 严格限制 8192 的模数链 <= 218 bits，[60, 40, 40, 40, 60] (240 bits)
+    # 会直接抛出 "encryption parameters are not set correctly"。
+    # 这里收缩首尾素数以保住 3 层深度；顶层 50 bits 仍为整数部分留出 10 bits。
+    "coeff_mod_bit_sizes": [50, 40, 40, 40, 48],
     "global_scale": SCALE_STD,
     "security_level": "128-bit"
 }
@@ -95,3 +107,90 @@ CONFIG_VOTING = {
     "plain_modulus": 1032193, 
     "security_level": "128-bit"
 }
+
+
+# ==============================================================================
+# 3. 上下文工厂 (Context Factory)
+# ==============================================================================
+
+def scheme_name(scheme):
+    """方案名或 ts.SCHEME_TYPE 成员 -> 方案名 (SCHEME_CKKS / SCHEME_BFV)，不导入后端。"""
+    return scheme if isinstance(scheme, str) else scheme.name
+
+
+def resolve_scheme(scheme):
+    """方案名 -> ts.SCHEME_TYPE 成员 (此时才导入后端)；传入的已是成员时原样返回 (兼容旧配置)。"""
+    if not isinstance(scheme, str):
+        return scheme
+    return getattr(ts.SCHEME_TYPE, scheme)
+
+
+def context_scheme(ctx):
+    """已创建的 Context 所用的方案名 (SCHEME_CKKS / SCHEME_BFV)。"""
+    if hasattr(ctx, "scheme"):
+        # 模拟后端直接记录方案
+        return ctx.scheme.name
+    return ctx.seal_context().data.key_context_data().parms().scheme().name
+
+
+def context_slots(ctx):
+    """已创建的 Context 每个密文的槽位数: CKKS 为 N/2，BFV 为 N。"""
+    if hasattr(ctx, "slot_count"):
+        # 模拟后端直接提供
+        return ctx.slot_count
+    degree = ctx.seal_context().data.key_context_data().parms().poly_modulus_degree()
+    return degree // 2 if context_scheme(ctx) == SCHEME_CKKS else degree
+
+
+def create_context(config, galois_keys=True, relin_keys=True, n_threads=None):
+    """
+    根据场景配置字典创建 TenSEAL Context。
+
+    - CKKS: 使用 coeff_mod_bit_sizes 与 global_scale
+    - BFV:  使用 plain_modulus
+    galois_keys / relin_keys 控制是否生成旋转密钥与重线性化密钥
+    (sum/dot/matmul 需要 Galois Keys，密文乘法需要 Relin Keys)。
+    n_threads 为该 Context 的原生线程池大小；None 时 TenSEAL 使用 cpu_count()，
+    与进程池并用时会超额占用 CPU，应由 tenseal_scheduler 分配。
+    """
+    if scheme_name(config["scheme_type"]) == SCHEME_BFV:
+        ctx = ts.context(
+            resolve_scheme(SCHEME_BFV),
+            poly_modulus_degree=config["poly_modulus_degree"],
+            plain_modulus=config["plain_modulus"],
+            n_threads=n_threads
+        )
+    else:
+        ctx = ts.context(
+            resolve_scheme(SCHEME_CKKS),
+            poly_modulus_degree=config["poly_modulus_degree"],
+            coeff_mod_bit_sizes=config["coeff_mod_bit_sizes"],
+            n_threads=n_threads
+        )
+        ctx.global_scale = config["global_scale"]
+
+    if galois_keys:
+        ctx.generate_galois_keys()
+    if relin_keys:
+        ctx.generate_relin_keys()
+    return ctx
+
+
+if __name__ == "__main__":
+    from bfv_aggregation import create_aggregation_context
+
+    print(">>> [模块] 场景配置: 字符串方案名 / 旧版 ts.SCHEME_TYPE 成员")
+    configs = {"CONFIG_STATS": CONFIG_STATS, "CONFIG_LR": CONFIG_LR, "CONFIG_DNN": CONFIG_DNN,
+               "CONFIG_VOTING": CONFIG_VOTING}
+    failures = 0
+    for name, config in configs.items():
+        legacy = dict(config, scheme_type=resolve_scheme(config["scheme_type"]))
+        for label, cfg in (("字符串", config), ("枚举", legacy)):
+            got = context_scheme(create_context(cfg, galois_keys=False, relin_keys=False))
+            ok = got == scheme_name(config["scheme_type"])
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:<14} {label:<4} scheme_type={cfg['scheme_type']!s:<18} -> {got}")
+    legacy_voting = dict(CONFIG_VOTING, scheme_type=resolve_scheme(SCHEME_BFV))
+    _, plain_modulus = create_aggregation_context(1000, config=legacy_voting)
+    print(f"✅ 旧版 BFV 配置用于聚合: plain_modulus={plain_modulus}")
+    print(f"不一致 {failures} 项")
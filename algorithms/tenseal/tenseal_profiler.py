@@ -0,0 +1,324 @@
+"""
+TenSEAL 操作级性能剖析 (Op-Level Profiling)
+---------------------------------------------------------
+生产环境中无法区分延迟到底来自 matmul、sum() 内部的旋转、重线性化，还是
+serialize / context_from。本模块在运行时替换 TenSEAL 的方法，按 (Context, 操作) 统计:
+    - 调用次数、总耗时、最大耗时
+    - 延迟直方图 (Prometheus 风格的累积桶)
+    - 估算的旋转次数 (Galois 密钥切换)，归属到发起它的高层调用 (sum/dot/matmul/广播)
+
+嵌套调用只记录最外层: 例如 matmul() 内部调用 mm()，全部耗时归属 matmul。
+重线性化在 auto_relin 下发生于 mul/square/pow 内部，其耗时计入这些操作。
+
+关闭时零开销: 只有在 with/装饰器 作用域内才替换方法，退出后原样恢复。
+
+使用方法:
+    from tenseal_profiler import PROFILER
+
+    with PROFILER:
+        enc = ts.ckks_vector(ctx, data)
+        enc.matmul(weight)
+    print(PROFILER.report())
+    PROFILER.to_json() / PROFILER.to_prometheus()
+
+    @PROFILER
+    def handle_request(...): ...
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import ContextDecorator
+
+import tenseal as ts
+
+from rotation_model import broadcast_rotations, matmul_rotations, sum_rotations
+
+# 延迟直方图上界 (秒)
+HISTOGRAM_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 被剖析的张量方法 (dunder 运算符内部都会转调这些方法)
+TENSOR_METHODS = (
+    "add", "add_", "sub", "sub_", "mul", "mul_", "neg", "neg_",
+    "square", "square_", "pow", "pow_", "polyval", "polyval_",
+    "sum", "sum_", "dot", "dot_", "matmul", "matmul_", "mm", "mm_",
+    "decrypt", "serialize",
+)
+TENSOR_CLASSES = (ts.CKKSVector, ts.CKKSTensor, ts.BFVVector, ts.BFVTensor)
+
+CONTEXT_METHODS = {
+    "serialize": "context_serialize",
+    "generate_galois_keys": "keygen_galois",
+    "generate_relin_keys": "keygen_relin",
+    "make_context_public": "context_make_public",
+    "copy": "context_copy",
+}
+
+# ts 模块级工厂函数 -> 操作名
+MODULE_FUNCTIONS = {
+    "context": "context_create",
+    "context_from": "context_load",
+    "ckks_vector": "encrypt",
+    "bfv_vector": "encrypt",
+    "ckks_tensor": "encrypt",
+    "bfv_tensor": "encrypt",
+    "ckks_vector_from": "deserialize",
+    "bfv_vector_from": "deserialize",
+    "ckks_tensor_from": "deserialize",
+    "bfv_tensor_from": "deserialize",
+}
+
+
+def _size(obj):
+    return obj.size() if isinstance(obj, (ts.CKKSVector, ts.BFVVector)) else None
+
+
+def _estimate_rotations(method, args):
+    """在调用前根据操作数估算旋转次数；张量 (CKKSTensor) 每个元素一个密文，不需要旋转。"""
+    self = args[0]
+    size = _size(self)
+    if size is None:
+        return 0
+    op = method.rstrip("_")
+    if op == "sum":
+        return sum_rotations(size)
+    if op == "dot":
+        return sum_rotations(size)
+    if op in ("matmul", "mm"):
+        return matmul_rotations(size)
+    if op in ("add", "sub", "mul") and len(args) > 1:
+        other = _size(args[1])
+        if other is not None and other != size and 1 in (size, other):
+            return broadcast_rotations(max(size, other))
+    return 0
+
+
+def context_label(ctx):
+    """Context 标签: 方案 / 多项式度数 / 模数链总位数，例如 CKKS/8192/218b。"""
+    try:
+        data = ctx.seal_context().data.key_context_data()
+        parms = data.parms()
+        return f"{parms.scheme().name}/{parms.poly_modulus_degree()}/{data.total_coeff_modulus_bit_count()}b"
+    except Exception:
+        return "unknown"
+
+
+def _label(obj):
+    if isinstance(obj, ts.Context):
+        return context_label(obj)
+    if isinstance(obj, TENSOR_CLASSES):
+        return context_label(obj.context())
+    return None
+
+
+# ==============================================================================
+# 指标 (Metrics)
+# ==============================================================================
+
+class OpMetric:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rotations = 0
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)  # 最后一个为 +Inf
+
+    def observe(self, seconds, rotations):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rotations += rotations
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "max_seconds": self.max_seconds,
+            "rotations": self.rotations,
+            "buckets": dict(zip([str(b) for b in HISTOGRAM_BUCKETS] + ["+Inf"], self.bucket_counts)),
+        }
+
+
+class Profiler(ContextDecorator):
+    """
+    既是上下文管理器也是装饰器。可重入: 嵌套的 with 只在最外层安装/卸载补丁。
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = []
+        self._active = 0
+
+    # ------------------------------------------------------------------
+    # 安装 / 卸载 (Install / Uninstall)
+    # ------------------------------------------------------------------
+    def __enter__(self):
+        with self._lock:
+            self._active += 1
+            if self._active == 1:
+                self._install()
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._uninstall()
+        return False
+
+    @property
+    def enabled(self):
+        return self._active > 0
+
+    def _patch(self, owner, attr, op, label_from_result=False):
+        original = getattr(owner, attr)
+        # 继承来的方法卸载时直接删除子类上的补丁，而不是把父类方法复制到子类
+        own = attr in vars(owner)
+        self._originals.append((owner, attr, original if own else None))
+        setattr(owner, attr, self._instrument(original, attr, op, label_from_result))
+
+    def _install(self):
+        for cls in TENSOR_CLASSES:
+            for method in TENSOR_METHODS:
+                if hasattr(cls, method):
+                    self._patch(cls, method, method)
+        for method, op in CONTEXT_METHODS.items():
+            self._patch(ts.Context, method, op)
+        for func, op in MODULE_FUNCTIONS.items():
+            self._patch(ts, func, op, label_from_result=func in ("context", "context_from"))
+
+    def _uninstall(self):
+        for owner, attr, original in reversed(self._originals):
+            if original is None:
+                delattr(owner, attr)
+            else:
+                setattr(owner, attr, original)
+        self._originals = []
+
+    def _instrument(self, fn, method, op, label_from_result):
+        profiler = self
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            local = profiler._local
+            if getattr(local, "depth", 0):
+                # 内层调用: 耗时与旋转已归属到外层操作
+                return fn(*args, **kwargs)
+
+            rotations = _estimate_rotations(method, args) if args and method in TENSOR_METHODS else 0
+            local.depth = 1
+            try:
+                start = time.perf_counter()
+                result = fn(*args, **kwargs)
+                elapsed = time.perf_counter() - start
+                label = _label(result) if label_from_result else _label(args[0]) if args else None
+            finally:
+                local.depth = 0
+            profiler.observe(label or "unknown", op, elapsed, rotations)
+            return result
+
+        return wrapper
+
+    # ------------------------------------------------------------------
+    # 记录与导出 (Record / Export)
+    # ------------------------------------------------------------------
+    def observe(self, context, op, seconds, rotations=0):
+        key = (context, op)
+        with self._lock:
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = OpMetric()
+            metric.observe(seconds, rotations)
+
+    def reset(self):
+        with self._lock:
+            self.metrics = {}
+
+    def to_dict(self):
+        return {f"{ctx}:{op}": m.to_dict() for (ctx, op), m in sorted(self.metrics.items())}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix="tenseal_op"):
+        """Prometheus 文本格式 (histogram + rotations counter)。"""
+        lines = [
+            f"# HELP {prefix}_seconds TenSEAL operation latency.",
+            f"# TYPE {prefix}_seconds histogram",
+        ]
+        for (ctx, op), m in sorted(self.metrics.items()):
+            labels = f'context="{ctx}",op="{op}"'
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS, m.bucket_counts):
+                cumulative += count
+                lines.append(f'{prefix}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_seconds_bucket{{{labels},le="+Inf"}} {m.count}')
+            lines.append(f"{prefix}_seconds_sum{{{labels}}} {m.total_seconds}")
+            lines.append(f"{prefix}_seconds_count{{{labels}}} {m.count}")
+        lines.append(f"# HELP {prefix}_rotations_total Estimated ciphertext rotations per operation.")
+        lines.append(f"# TYPE {prefix}_rotations_total counter")
+        for (ctx, op), m in sorted(self.metrics.items()):
+            lines.append(f'{prefix}_rotations_total{{context="{ctx}",op="{op}"}} {m.rotations}')
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        """按总耗时降序的文本表格。"""
+        lines = [f"{'Context':<18} | {'Op':<20} | {'Count':<6} | {'Total(ms)':<10} | "
+                 f"{'Mean(ms)':<9} | {'Max(ms)':<9} | {'Rotations':<9}",
+                 "-" * 96]
+        for (ctx, op), m in sorted(self.metrics.items(), key=lambda kv: -kv[1].total_seconds):
+            lines.append(f"{ctx:<18} | {op:<20} | {m.count:<6} | {m.total_seconds * 1000:<10.2f} | "
+                         f"{m.total_seconds / m.count * 1000:<9.3f} | {m.max_seconds * 1000:<9.3f} | {m.rotations:<9}")
+        return "\n".join(lines)
+
+
+# 全局默认剖析器
+PROFILER = Profiler()
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    from tenseal_config import CONFIG_LR, create_context
+
+    print(">>> [模块] TenSEAL 操作级剖析演示")
+
+    # 剖析器关闭时的开销: 方法未被替换，调用路径与原生完全一致
+    print(f"剖析器状态: {'开启' if PROFILER.enabled else '关闭'}, "
+          f"CKKSVector.sum 已被替换: {hasattr(ts.CKKSVector.sum, '__wrapped__')}")
+
+    @PROFILER
+    def serve_request(server_ctx_bytes, enc_bytes, weight):
+        # 模拟服务端: 加载 Context -> 反序列化 -> 线性层 -> 激活 -> 求和 -> 回传
+        server_ctx = ts.context_from(server_ctx_bytes)
+        enc = ts.ckks_vector_from(server_ctx, enc_bytes)
+        out = enc.matmul(weight).square()
+        return out.sum().serialize()
+
+    with PROFILER:
+        ctx = create_context(CONFIG_LR)
+        public_bytes = ctx.serialize(save_secret_key=False)
+        x = np.random.uniform(-1, 1, 64)
+        enc_bytes = ts.ckks_vector(ctx, x.tolist()).serialize()
+
+    weight = np.random.uniform(-0.1, 0.1, (64, 16)).tolist()
+    for _ in range(3):
+        result = serve_request(public_bytes, enc_bytes, weight)
+
+    print(f"退出后 CKKSVector.sum 已恢复: {not hasattr(ts.CKKSVector.sum, '__wrapped__')}")
+
+    print("\n--- A. 文本报告 ---")
+    print(PROFILER.report())
+
+    print("\n--- B. Prometheus 导出 (节选) ---")
+    print("\n".join(line for line in PROFILER.to_prometheus().splitlines()
+                    if "rotations_total{" in line or "_seconds_sum" in line))
@@ -0,0 +1,322 @@
+"""
+CPU 感知调度器 (Core-Aware Scheduler)
+---------------------------------------------------------
+TenSEAL 的每个 Context 自带一个原生线程池，未指定 n_threads 时大小为 multiprocessing.cpu_count()
+(不考虑容器/affinity 限制)。再叠加 Python 进程池后，线程数 = 进程数 × cpu_count，
+严重超额占用 CPU，负载下尾延迟 (p99) 飙升。
+
+本调度器统一持有本机 CPU 预算，并在两级并行之间切分:
+    - 算子内 (intra-op): Context 的 n_threads。TenSEAL 只在以下位置使用线程池，
+      可并行的独立任务数 (width) 决定了线程数的上限:
+          matmul         -> 输入长度 (逐对角线旋转)
+          CKKSTensor 运算 -> 元素个数 (每个元素一个密文)
+          向量逐元素运算  -> 分块数 ceil(size / slots)，单密文向量为 1，多线程无收益
+    - 请求间 (inter-request): 工作进程数 = 预算 // n_threads
+
+切分依据可以是 width 的静态估计 (plan_partition)，也可以是实测加速比 (calibrate + choose_threads)。
+可选 CPU 绑定 (pin=True): 每个工作进程独占一段核心，原生线程在绑定后创建，继承相同的 affinity。
+
+使用方法:
+    ctx_bytes = create_context(CONFIG_LR).serialize(save_secret_key=True)
+    with Scheduler.for_workload(ctx_bytes, CONFIG_LR, "matmul", 64, pin=True) as sched:
+        futures = [sched.submit(job, blob) for blob in blobs]   # job(ctx, blob) 在工作进程中执行
+        results = [f.result() for f in futures]
+"""
+
+import math
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tenseal_backend import ts
+from tenseal_config import SCHEME_BFV, create_context, scheme_name
+
+# 选择线程数时要求的最低并行效率 (加速比 / 线程数)
+MIN_EFFICIENCY = 0.6
+
+
+def available_cores():
+    """当前进程可用的核心编号 (尊重 taskset / cgroup cpuset)。"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parallel_width(op, size, slots):
+    """一次操作中 TenSEAL 线程池可并行的独立任务数。"""
+    if op == "matmul":
+        return size
+    if op.startswith("tensor"):
+        return size
+    return math.ceil(size / slots)
+
+
+def plan_partition(budget, width, max_threads=None):
+    """
+    在 budget 个核心内切分 (n_threads, workers)。
+    线程数不超过可并行任务数 (多出的线程只会空转)，剩余核心交给进程级并行。
+    """
+    threads = max(1, min(width, budget, max_threads or budget))
+    return threads, max(1, budget // threads)
+
+
+# ==============================================================================
+# 实测标定 (Calibration)
+# ==============================================================================
+
+def _make_op(ctx, config, op, size, rng):
+    is_bfv = scheme_name(config["scheme_type"]) == SCHEME_BFV
+    if op == "matmul":
+        vec = ts.ckks_vector(ctx, rng.uniform(-1, 1, size).tolist())
+        weight = rng.uniform(-1, 1, (size, 16)).tolist()
+        return lambda: vec.matmul(weight)
+    if op == "tensor_mul":
+        plain = rng.uniform(-1, 1, size).tolist()
+        enc = ts.ckks_tensor(ctx, plain)
+        return lambda: enc * enc
+    encrypt = ts.bfv_vector if is_bfv else ts.ckks_vector
+    data = rng.integers(0, 100, size).tolist() if is_bfv else rng.uniform(-1, 1, size).tolist()
+    vec = encrypt(ctx, data)
+    if op == "mul":
+        return lambda: vec * vec
+    if op == "dot":
+        return lambda: vec.dot(vec)
+    if op == "encrypt":
+        return lambda: encrypt(ctx, data)
+    raise ValueError(f"未知操作: {op}")
+
+
+def calibrate(config, op, size, thread_options=None, repeat=3, context_bytes=None, seed=0):
+    """
+    实测 op 在不同 n_threads 下的中位耗时，返回 {n_threads: seconds}。
+    同一份 Context 序列化后按不同 n_threads 重新加载，避免重复生成密钥。
+    """
+    budget = len(available_cores())
+    if thread_options is None:
+        thread_options = sorted({1, 2, 4, 8, budget} & set(range(1, budget + 1)))
+    if context_bytes is None:
+        context_bytes = create_context(config).serialize(save_secret_key=True)
+
+    timings = {}
+    for n_threads in thread_options:
+        ctx = ts.context_from(context_bytes, n_threads=n_threads)
+        fn = _make_op(ctx, config, op, size, np.random.default_rng(seed))
+        fn()  # 预热
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            durations.append(time.perf_counter() - start)
+        timings[n_threads] = statistics.median(durations)
+    return timings
+
+
+def choose_threads(timings, min_efficiency=MIN_EFFICIENCY):
+    """
+    选择并行效率 (t1 / (k * tk)) 不低于 min_efficiency 的最大线程数 k。
+    效率过低的线程留给其他请求，总吞吐更高，尾延迟也更稳定。
+    """
+    base = timings[min(timings)]
+    best = min(timings)
+    for k in sorted(timings):
+        if base / (k * timings[k]) >= min_efficiency:
+            best = k
+    return best
+
+
+# ==============================================================================
+# 工作进程 (Worker)
+# ==============================================================================
+
+_WORKER_CTX = None
+
+
+def _init_worker(context_bytes, n_threads, core_queue):
+    global _WORKER_CTX
+    if core_queue is not None:
+        # 先绑核再加载 Context: 原生线程池在加载时创建，继承绑定后的 affinity
+        os.sched_setaffinity(0, core_queue.get())
+    _WORKER_CTX = ts.context_from(context_bytes, n_threads=n_threads)
+
+
+def _ping(ctx, delay=0.0):
+    # 短暂占住工作进程，使同一轮的 ping 分散到不同进程
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _run_job(fn, args):
+    start = time.perf_counter()
+    result = fn(_WORKER_CTX, *args)
+    return result, time.perf_counter() - start
+
+
+class Scheduler:
+    """
+    持有 CPU 预算的加密任务调度器。
+
+    context_bytes 在每个工作进程中只加载一次 (n_threads 已按切分设置)；
+    submit(fn, *args) 中的 fn 签名为 fn(ctx, *args)，须为模块级函数 (spawn 需要可 pickle)，
+    参数与返回值通常是序列化后的密文 bytes。
+    """
+
+    def __init__(self, context_bytes, cores=None, n_threads=1, workers=None, pin=False, mp_context="spawn"):
+        self.cores = list(cores) if cores is not None else available_cores()
+        budget = len(self.cores)
+        self.n_threads = max(1, n_threads)
+        self.workers = workers or max(1, budget // self.n_threads)
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self.latencies = []
+
+        mp = multiprocessing.get_context(mp_context)
+        core_queue = None
+        if self.pin:
+            core_queue = mp.Queue()
+            for i in range(self.workers):
+                group = self.cores[i * self.n_threads:(i + 1) * self.n_threads] or self.cores[-self.n_threads:]
+                core_queue.put(set(group))
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=mp, initializer=_init_worker,
+            initargs=(context_bytes, self.n_threads, core_queue),
+        )
+
+    @classmethod
+    def for_workload(cls, context_bytes, config, op, size, cores=None, pin=False, measure=False, **kwargs):
+        """
+        按操作规模切分: measure=False 时用 parallel_width 估计，
+        measure=True 时在本机实测不同 n_threads 的加速比后选择。
+        """
+        cores = list(cores) if cores is not None else available_cores()
+        max_threads = None
+        if measure:
+            options = [k for k in (1, 2, 4, 8, 16) if k <= len(cores)]
+            timings = calibrate(config, op, size, options, context_bytes=context_bytes)
+            max_threads = choose_threads(timings)
+        slots = config["poly_modulus_degree"] // (1 if scheme_name(config["scheme_type"]) == SCHEME_BFV else 2)
+        n_threads, workers = plan_partition(len(cores), parallel_width(op, size, slots), max_threads)
+        return cls(context_bytes, cores, n_threads, workers, pin, **kwargs)
+
+    # ------------------------------------------------------------------
+    # 提交任务 (Submit)
+    # ------------------------------------------------------------------
+    def submit(self, fn, *args):
+        """提交一个加密任务，返回 Future，结果为 fn(ctx, *args) 的返回值。"""
+        inner = self._pool.submit(_run_job, fn, args)
+        return _JobFuture(inner, self.latencies)
+
+    def warm_up(self, timeout=60.0):
+        """
+        提前拉起全部工作进程并加载 Context，避免首批请求承担启动开销。
+        逐轮发送 ping 直到每个工作进程都应答过 (或超时)，返回应答过的不同进程数。
+        """
+        pids = set()
+        deadline = time.monotonic() + timeout
+        while len(pids) < self.workers and time.monotonic() < deadline:
+            futures = [self._pool.submit(_run_job, _ping, (0.05,)) for _ in range(self.workers)]
+            # _run_job 返回 (结果, 耗时)，只取 pid
+            pids.update(f.result()[0] for f in futures)
+        return len(pids)
+
+    def map(self, fn, iterable):
+        futures = [self.submit(fn, item) for item in iterable]
+        return [f.result() for f in futures]
+
+    def latency_summary(self):
+        """工作进程内的执行耗时 (不含排队)，单位秒。"""
+        if not self.latencies:
+            return {}
+        arr = np.array(self.latencies)
+        return {"jobs": len(arr), "p50": float(np.percentile(arr, 50)),
+                "p99": float(np.percentile(arr, 99)), "max": float(arr.max())}
+
+    def describe(self):
+        return (f"{len(self.cores)} 核 = {self.workers} 进程 × {self.n_threads} 线程"
+                f"{' (绑核)' if self.pin else ''}")
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+class _JobFuture:
+    """包装 Future: 解出 fn 的返回值，并记录工作进程内的执行耗时。"""
+
+    def __init__(self, inner, latencies):
+        self._inner = inner
+        self._latencies = latencies
+        self._done = False
+
+    def result(self, timeout=None):
+        value, seconds = self._inner.result(timeout)
+        if not self._done:
+            self._latencies.append(seconds)
+            self._done = True
+        return value
+
+    def done(self):
+        return self._inner.done()
+
+
+# ==============================================================================
+# 演示用任务 (必须是模块级函数)
+# ==============================================================================
+
+def matmul_job(ctx, blob, weight):
+    vec = ts.ckks_vector_from(ctx, blob)
+    return vec.matmul(weight).serialize()
+
+
+if __name__ == "__main__":
+    from tenseal_config import CONFIG_LR
+
+    print(">>> [模块] CPU 感知调度器")
+    cores = available_cores()
+    print(f"可用核心: {cores} (cpu_count = {os.cpu_count()})")
+
+    size, n_jobs = 32, 16
+    rng = np.random.default_rng(0)
+    client_ctx = create_context(CONFIG_LR)
+    ctx_bytes = client_ctx.serialize(save_secret_key=True)
+    weight = rng.uniform(-0.5, 0.5, (size, 16)).tolist()
+    inputs = [rng.uniform(-1, 1, size) for _ in range(n_jobs)]
+    blobs = [ts.ckks_vector(client_ctx, x.tolist()).serialize() for x in inputs]
+
+    # --- A. 实测不同 n_threads 的加速比 ---
+    print(f"\n--- A. 标定: matmul (size={size}) ---")
+    timings = calibrate(CONFIG_LR, "matmul", size, context_bytes=ctx_bytes)
+    for k, t in timings.items():
+        print(f"n_threads={k:<2}: {t * 1000:.1f} ms (效率 {timings[min(timings)] / (k * t):.2f})")
+    print(f"选择 n_threads = {choose_threads(timings)}")
+
+    # --- B. 对比: 默认 (每进程 cpu_count 线程) vs 调度切分 ---
+    print("\n--- B. 吞吐与尾延迟 ---")
+    layouts = [
+        ("默认 (超额订阅)", dict(n_threads=os.cpu_count(), workers=len(cores))),
+        ("调度切分", None),
+    ]
+    for label, layout in layouts:
+        if layout is None:
+            sched = Scheduler.for_workload(ctx_bytes, CONFIG_LR, "matmul", size, pin=True, measure=True)
+        else:
+            sched = Scheduler(ctx_bytes, cores, **layout)
+        with sched:
+            sched.warm_up()
+            start = time.perf_counter()
+            futures = [sched.submit(matmul_job, blob, weight) for blob in blobs]
+            outputs = [f.result() for f in futures]
+            elapsed = time.perf_counter() - start
+            lat = sched.latency_summary()
+        err = max(np.max(np.abs(np.array(ts.ckks_vector_from(client_ctx, out).decrypt()) - x.dot(weight)))
+                  for out, x in zip(outputs, inputs))
+        print(f"{label:<14} {sched.describe():<24} | {n_jobs / elapsed:6.1f} jobs/s | "
+              f"p50 {lat['p50'] * 1000:.1f}ms p99 {lat['p99'] * 1000:.1f}ms | 最大误差 {err:.1e}")
@@ -0,0 +1,490 @@
+"""
+快速启动 (Fast Start): 上下文快照与预热工作进程
+---------------------------------------------------------
+短生命周期的 CLI 任务、每个任务拉起一个的工作进程，启动时间主要花在 (8192 / 16384 实测):
+    import tenseal (连带 numpy)           ~0.13 s
+    create_context: Galois Keys 生成      CONFIG_LR ~0.4 s, CONFIG_DNN ~2.6 s
+    (不含 Galois Keys 的上下文)            CONFIG_LR ~0.05 s, CONFIG_DNN ~0.25 s
+
+本模块提供三层优化，逐层叠加:
+    1. 延迟导入: tenseal_backend.ts 为延迟代理，tenseal_config 的方案常量是名称字符串，
+       import tenseal_config 不再加载原生库 (~0.13 s -> ~5 ms)。
+    2. 上下文快照 (load_context): 按配置哈希把带私钥的序列化 Context 存到磁盘，再次启动时
+       直接反序列化，跳过密钥生成，并保证多次运行使用同一套密钥 (之前保存的密文仍可解密)。
+       快照默认关闭: 只有显式传入 cache_dir (或 serve --cache-dir) 时才把私钥写盘。
+       注意: 带私钥序列化时 TenSEAL 只保存私钥，加载时重新生成 Galois Keys (8192 下 0.8 MB)；
+       单独保存公钥侧的 Galois Keys 则有 ~53 MB，解析耗时与生成相当。因此快照只对不含 Galois Keys
+       的上下文明显提速，需要旋转的任务应交给预热进程。
+    3. 预热进程 (WarmServer / WarmClient): 常驻进程加载一次 Context 后 fork 出工作进程，
+       子进程直接继承内存中的 Context (写时复制)，无需反序列化。短任务连接本地套接字，
+       提交 "module:function" 与参数，客户端进程不导入 tenseal，也不生成/加载密钥。
+
+fork 之前 Context 固定为 n_threads=1: fork 不复制线程，继承的原生线程池在子进程中没有工作线程；
+并行度由工作进程数提供 (与 tenseal_scheduler 的 "进程 × 单线程" 切分一致)。
+fork 仅在 Linux / macOS 可用；Windows 请改用 tenseal_scheduler.Scheduler (spawn + 快照字节)。
+
+快照与预热进程都持有私钥: 快照文件权限为 0600 (目录 0700)，预热进程只接受持有 authkey 的客户端
+(请求以 pickle 传输，不要把 authkey 交给不可信方)。
+
+使用方法:
+    # 常驻进程 (打印需要导出的环境变量)
+    python tenseal_warmstart.py serve CONFIG_LR CONFIG_DNN --preload numpy_io
+
+    # 短任务: job(ctx, *args) 在预热工作进程中执行，预热进程不可用时在本进程内创建 Context
+    result = run_job("CONFIG_LR", "my_jobs:score", values, config=CONFIG_LR)
+    # 同上，但本地回退时复用 ~/.cache/tenseal 下的快照 (私钥写盘，需调用方明确选择)
+    result = run_job("CONFIG_LR", "my_jobs:score", values, config=CONFIG_LR, cache_dir=DEFAULT_CACHE_DIR)
+
+    # 启动时间基准
+    python tenseal_warmstart.py bench --configs CONFIG_LR CONFIG_DNN
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+import tenseal_config
+from tenseal_backend import BACKEND, ts
+from tenseal_config import create_context
+
+# 建议的快照目录；快照包含私钥，任何函数都不会默认使用它
+DEFAULT_CACHE_DIR = os.environ.get("TENSEAL_CONTEXT_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "tenseal"))
+
+# 客户端通过环境变量找到预热进程
+ENV_ADDRESS = "TENSEAL_WARM_ADDRESS"
+ENV_AUTHKEY = "TENSEAL_WARM_AUTHKEY"
+
+
+# ==============================================================================
+# 1. 上下文快照 (Context Snapshot)
+# ==============================================================================
+
+def snapshot_key(config, galois_keys=True, relin_keys=True):
+    """配置 + 密钥选项 + 后端 -> 快照文件名中的哈希 (name 字段不影响密钥，不参与哈希)。"""
+    spec = {k: v for k, v in config.items() if k != "name"}
+    spec.update(backend=BACKEND, galois_keys=galois_keys, relin_keys=relin_keys)
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def snapshot_path(config, cache_dir, galois_keys=True, relin_keys=True):
+    return os.path.join(cache_dir, f"context-{snapshot_key(config, galois_keys, relin_keys)}.bin")
+
+
+def save_snapshot(ctx, path):
+    """原子写入带私钥的 Context 快照 (先写临时文件再 rename，权限 0600)。"""
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    data = ctx.serialize(save_secret_key=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_context(config, galois_keys=True, relin_keys=True, n_threads=None, cache_dir=None):
+    """
+    从 cache_dir 中的快照恢复 Context；快照不存在时生成密钥并写入快照。
+    参数与 create_context 相同；cache_dir=None (默认) 时直接 create_context，不读写任何文件。
+    """
+    if cache_dir is None:
+        return create_context(config, galois_keys, relin_keys, n_threads)
+    path = snapshot_path(config, cache_dir, galois_keys, relin_keys)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        ctx = create_context(config, galois_keys, relin_keys, n_threads)
+        save_snapshot(ctx, path)
+        return ctx
+    return ts.context_from(data, n_threads)
+
+
+# ==============================================================================
+# 2. 预热工作进程 (Warm Workers)
+# ==============================================================================
+
+# 预热进程内: 名称 -> Context，在 fork 工作进程之前填充，由子进程继承
+_WARM_CONTEXTS = {}
+_TARGETS = {}
+
+
+def resolve_target(target):
+    """任务名 "module:function" -> 函数 (每个进程缓存一次)；已是可调用对象时原样返回。"""
+    if callable(target):
+        return target
+    fn = _TARGETS.get(target)
+    if fn is None:
+        module, _, name = target.partition(":")
+        if not name:
+            raise ValueError(f"任务应写作 'module:function'，收到 {target!r}")
+        fn = _TARGETS[target] = getattr(importlib.import_module(module), name)
+    return fn
+
+
+def _ping():
+    return os.getpid()
+
+
+def _run_warm(name, target, args, kwargs):
+    if name not in _WARM_CONTEXTS:
+        raise KeyError(f"预热进程中没有 Context {name!r}，可用: {sorted(_WARM_CONTEXTS)}")
+    return resolve_target(target)(_WARM_CONTEXTS[name], *args, **kwargs)
+
+
+def _picklable(exc):
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+class WarmServer:
+    """
+    持有已加载 Context 的常驻进程 + 预先 fork 的工作进程池。
+
+    contexts: {名称: 场景配置}，每个配置加载一次 (经快照)，所有工作进程共享。
+    preload:  fork 之前导入的模块 (任务模块、numpy_io 等)，避免每个工作进程首个任务时再导入。
+    """
+
+    def __init__(self, contexts, address=None, authkey=None, workers=None, galois_keys=True, relin_keys=True,
+                 cache_dir=None, preload=()):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("当前平台不支持 fork，请改用 tenseal_scheduler.Scheduler (spawn + 快照字节)")
+        self.contexts = dict(contexts)
+        self.address = address or os.path.join(tempfile.gettempdir(), f"tenseal-warm-{os.getpid()}.sock")
+        self.authkey = authkey or os.urandom(16)
+        self.workers = workers
+        self.galois_keys = galois_keys
+        self.relin_keys = relin_keys
+        self.cache_dir = cache_dir
+        self.preload = tuple(preload)
+        self._process = None
+
+    def environ(self):
+        """客户端 (WarmClient / run_job) 所需的环境变量。"""
+        return {ENV_ADDRESS: self.address, ENV_AUTHKEY: self.authkey.hex()}
+
+    # ------------------------------------------------------------------
+    # 预热进程主体
+    # ------------------------------------------------------------------
+    def serve_forever(self, ready=None):
+        """在当前进程中加载 Context、fork 工作进程并处理请求，直到收到 shutdown。"""
+        # 调度模块连带导入 numpy，只在服务端需要
+        from tenseal_scheduler import available_cores
+
+        for name, config in self.contexts.items():
+            _WARM_CONTEXTS[name] = load_context(config, self.galois_keys, self.relin_keys, n_threads=1,
+                                                cache_dir=self.cache_dir)
+        for module in self.preload:
+            importlib.import_module(module)
+        workers = self.workers or len(available_cores())
+
+        # 在启动任何线程之前 fork 出全部工作进程
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+        for f in [pool.submit(_ping) for _ in range(workers)]:
+            f.result()
+
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        listener = Listener(self.address, authkey=self.authkey)
+        stop = threading.Event()
+        if ready is not None:
+            ready.send("ready")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, multiprocessing.AuthenticationError):
+                    # 客户端认证失败或握手中断，不影响其它连接
+                    continue
+                if stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self._handle, args=(conn, pool, stop, workers), daemon=True).start()
+        finally:
+            listener.close()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _handle(self, conn, pool, stop, workers):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                kind = request[0]
+                if kind == "shutdown":
+                    conn.send(("ok", None))
+                    stop.set()
+                    # 关闭 listener 不能唤醒阻塞中的 accept，用一次自连接让主循环看到 stop
+                    Client(self.address, authkey=self.authkey).close()
+                    return
+                if kind == "describe":
+                    conn.send(("ok", {"pid": os.getpid(), "backend": BACKEND, "workers": workers,
+                                      "contexts": sorted(_WARM_CONTEXTS)}))
+                    continue
+                _, name, target, args, kwargs = request
+                try:
+                    conn.send(("ok", pool.submit(_run_warm, name, target, args, kwargs).result()))
+                except Exception as exc:
+                    conn.send(("error", _picklable(exc)))
+
+    # ------------------------------------------------------------------
+    # 后台启动 / 停止
+    # ------------------------------------------------------------------
+    def start(self, timeout=120):
+        """在后台 fork 一个预热进程，Context 加载完毕、工作进程就绪后返回。"""
+        mp = multiprocessing.get_context("fork")
+        receiver, sender = mp.Pipe(duplex=False)
+        self._process = mp.Process(target=self._serve_child, args=(sender,))
+        self._process.start()
+        sender.close()
+        if not receiver.poll(timeout):
+            self._process.terminate()
+            raise TimeoutError(f"预热进程 {timeout}s 内未就绪")
+        try:
+            status = receiver.recv()
+        except EOFError:
+            status = f"进程意外退出 (exitcode={self._process.exitcode})"
+        if status != "ready":
+            self._process.join()
+            raise RuntimeError(f"预热进程启动失败: {status}")
+        return self
+
+    def _serve_child(self, ready):
+        try:
+            self.serve_forever(ready)
+        except Exception as exc:
+            ready.send(f"{type(exc).__name__}: {exc}")
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            with WarmClient(self.address, self.authkey) as client:
+                client.shutdown()
+        except OSError:
+            pass
+        self._process.join()
+        self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class WarmClient:
+    """
+    连接预热进程。只依赖标准库，不导入 tenseal / numpy。
+    address / authkey 默认从环境变量 TENSEAL_WARM_ADDRESS / TENSEAL_WARM_AUTHKEY (hex) 读取。
+    """
+
+    def __init__(self, address=None, authkey=None):
+        address = address or os.environ.get(ENV_ADDRESS)
+        if authkey is None and ENV_AUTHKEY in os.environ:
+            authkey = bytes.fromhex(os.environ[ENV_AUTHKEY])
+        if not address or authkey is None:
+            raise ConnectionError(f"未配置预热进程: 需要 {ENV_ADDRESS} 与 {ENV_AUTHKEY}")
+        self._conn = Client(address, authkey=authkey)
+
+    def _request(self, *request):
+        self._conn.send(request)
+        status, value = self._conn.recv()
+        if status == "error":
+            raise value
+        return value
+
+    def call(self, context, target, *args, **kwargs):
+        """在预热工作进程中执行 target(ctx, *args, **kwargs)，target 为 "module:function"。"""
+        return self._request("call", context, target, args, kwargs)
+
+    def describe(self):
+        return self._request("describe")
+
+    def shutdown(self):
+        return self._request("shutdown")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def run_job(context, target, *args, config=None, cache_dir=None, **kwargs):
+    """
+    优先交给预热进程执行；未配置或连接失败时在本进程内加载 Context 后执行。
+    context 为预热进程中的 Context 名称；本地回退需要提供 config，
+    传入 cache_dir 时本地回退经快照加载 (见 load_context)。
+    """
+    try:
+        client = WarmClient()
+    except OSError:
+        if config is None:
+            raise
+        return resolve_target(target)(load_context(config, cache_dir=cache_dir), *args, **kwargs)
+    with client:
+        return client.call(context, target, *args, **kwargs)
+
+
+# ==============================================================================
+# 3. 启动时间基准 (Startup Benchmark)
+# ==============================================================================
+
+# 基准任务: 加密 -> 与明文权重做点积 (需要 Galois Keys) -> 解密
+JOB_SIZE = 256
+
+
+def demo_job(ctx, values, weights):
+    return ts.ckks_vector(ctx, values).dot(weights).decrypt()[0]
+
+
+_JOB_DATA = f"""
+values = [((i * 37) % 101) / 101 for i in range({JOB_SIZE})]
+weights = [((i * 53) % 97) / 97 - 0.5 for i in range({JOB_SIZE})]
+"""
+
+# 每个场景都在全新的 Python 进程中执行，计时包含解释器启动
+STARTUP_SCRIPTS = {
+    "冷启动 (生成密钥)": _JOB_DATA + """
+from tenseal_config import {name}, create_context
+from tenseal_warmstart import demo_job
+print(demo_job(create_context({name}), values, weights))
+""",
+    "快照恢复": _JOB_DATA + """
+from tenseal_config import {name}
+from tenseal_warmstart import demo_job, load_context
+print(demo_job(load_context({name}, cache_dir={cache_dir!r}), values, weights))
+""",
+    "预热进程": _JOB_DATA + """
+from tenseal_warmstart import WarmClient
+with WarmClient() as client:
+    print(client.call({name!r}, "tenseal_warmstart:demo_job", values, weights))
+""",
+}
+
+
+def _script_env():
+    here = os.path.dirname(os.path.abspath(__file__))
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+
+
+def _run_script(source, env):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", source], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, float(out.stdout.strip().splitlines()[-1])
+
+
+def import_times(repeat=5):
+    """全新进程中 import tenseal_config 的耗时，以及此时后端是否已被加载。"""
+    source = ("import time; t = time.perf_counter(); import tenseal_config, tenseal_backend; "
+              "print(time.perf_counter() - t, tenseal_backend.is_loaded())")
+    eager = ("import time; t = time.perf_counter(); import tenseal_config, tenseal_backend; "
+             "tenseal_backend.load(); print(time.perf_counter() - t, True)")
+    results = {}
+    for label, src in (("延迟导入", source), ("导入后立即加载后端", eager)):
+        samples = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", src], env=_script_env(), capture_output=True, text=True,
+                                 check=True)
+            seconds, loaded = out.stdout.split()
+            samples.append(float(seconds))
+        results[label] = (statistics.median(samples), loaded == "True")
+    return results
+
+
+def startup_benchmark(names, repeat=3):
+    """每个配置 x 每种启动方式，在全新进程中运行基准任务，返回 {(配置, 方式): (中位耗时, 结果)}。"""
+    env = _script_env()
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configs = {name: getattr(tenseal_config, name) for name in names}
+        # 预热进程与 "快照恢复" 共用快照目录: 启动时生成快照，之后的进程直接读取
+        start = time.perf_counter()
+        server = WarmServer(configs, address=os.path.join(cache_dir, "warm.sock"), cache_dir=cache_dir,
+                            preload=("tenseal_warmstart",)).start()
+        results["预热进程启动 (一次性)"] = time.perf_counter() - start
+        env.update(server.environ())
+        try:
+            for name in names:
+                for label, template in STARTUP_SCRIPTS.items():
+                    source = template.format(name=name, cache_dir=cache_dir)
+                    runs = [_run_script(source, env) for _ in range(repeat)]
+                    results[(name, label)] = (statistics.median(t for t, _ in runs), runs[-1][1])
+        finally:
+            server.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TenSEAL 快速启动: 预热进程与启动时间基准")
+    sub = parser.add_subparsers(dest="command")
+
+    bench_p = sub.add_parser("bench", help="启动时间基准 (默认)")
+    bench_p.add_argument("--configs", nargs="+", default=["CONFIG_LR", "CONFIG_DNN"])
+    bench_p.add_argument("--repeat", type=int, default=3)
+
+    serve_p = sub.add_parser("serve", help="启动常驻预热进程")
+    serve_p.add_argument("configs", nargs="+", help="tenseal_config 中的配置名，同时作为 Context 名称")
+    serve_p.add_argument("--address", help="Unix 套接字路径")
+    serve_p.add_argument("--workers", type=int, help="工作进程数，默认等于可用核心数")
+    serve_p.add_argument("--preload", nargs="*", default=[], help="fork 之前导入的任务模块")
+    serve_p.add_argument("--cache-dir", help=f"保存带私钥快照的目录 (如 {DEFAULT_CACHE_DIR})，默认不写快照")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = WarmServer({name: getattr(tenseal_config, name) for name in args.configs}, args.address,
+                            workers=args.workers, cache_dir=args.cache_dir, preload=args.preload)
+        for key, value in server.environ().items():
+            print(f"export {key}={value}")
+        print(f"🔥 预热进程 pid={os.getpid()}，Context: {', '.join(args.configs)}", flush=True)
+        server.serve_forever()
+        return 0
+
+    names = getattr(args, "configs", None) or ["CONFIG_LR", "CONFIG_DNN"]
+    repeat = getattr(args, "repeat", 3)
+    print(">>> [模块] 快速启动: 延迟导入 / 上下文快照 / 预热进程")
+
+    print("\n--- A. import tenseal_config (全新进程) ---")
+    for label, (seconds, loaded) in import_times().items():
+        print(f"{label:<18}: {seconds * 1000:6.1f} ms (后端已加载: {loaded})")
+
+    print(f"\n--- B. 单个短任务的端到端耗时 (全新进程，含解释器启动，中位数 / {repeat} 次) ---")
+    results = startup_benchmark(names, repeat)
+    print(f"预热进程启动 (一次性): {results.pop('预热进程启动 (一次性)'):.2f} s")
+    expected = sum(((i * 37) % 101) / 101 * (((i * 53) % 97) / 97 - 0.5) for i in range(JOB_SIZE))
+    print(f"\n{'配置':<12} | {'启动方式':<12} | {'耗时(s)':<8} | {'加速':<7} | 误差")
+    print("-" * 62)
+    for name in names:
+        cold = results[(name, "冷启动 (生成密钥)")][0]
+        for label in STARTUP_SCRIPTS:
+            seconds, value = results[(name, label)]
+            print(f"{name:<12} | {label:<12} | {seconds:<8.3f} | {cold / seconds:<6.1f}x | {abs(value - expected):.1e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())